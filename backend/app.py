@@ -1,11 +1,12 @@
 import pandas as pd
 import numpy as np
-from flask import Flask, jsonify, request, send_file, Response, send_from_directory
+from flask import Flask, jsonify, request, send_file, Response, send_from_directory, stream_with_context
 from flask_cors import CORS
 import requests
 import os
 import pymysql
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import HTTPException
 from werkzeug.security import safe_join
 import time
 from functools import wraps
@@ -15,7 +16,14 @@ import socket
 import subprocess
 import re
 import datetime
-from pymysql.cursors import DictCursor
+import bisect
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pymysql.cursors import DictCursor, SSDictCursor
+from pymysql.constants import FIELD_TYPE
 
 # 新增导入：PDF生成和图表绘制
 from reportlab.lib.pagesizes import letter, A4
@@ -28,10 +36,102 @@ import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.use('Agg')  # 使用非交互式后端
 import seaborn as sns
+from openpyxl import Workbook
 import io
 import base64
+import csv
+import decimal
+import tempfile
+import urllib.parse
+import hashlib
+import uuid
+import zlib
+from collections import OrderedDict
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+# brotli/zstd 为可选依赖，未安装时只协商 gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+# pyarrow 为可选依赖，未安装时不支持 parquet/arrow 导出
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+def round_floats(obj, digits):
+    """递归地把浮点数保留 digits 位小数"""
+    if isinstance(obj, float):
+        return round(obj, digits)
+    if isinstance(obj, dict):
+        return {key: round_floats(value, digits) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [round_floats(value, digits) for value in obj]
+    if isinstance(obj, np.ndarray) and obj.dtype.kind == 'f':
+        return np.round(obj, digits)
+    if isinstance(obj, np.floating):
+        return round(float(obj), digits)
+    return obj
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """基于 orjson 的JSON序列化：原生支持 datetime、Decimal 和 NumPy 类型，
+    浮点数位数由 JSON_FLOAT_DIGITS 配置或 dumps(float_digits=...) 指定"""
+
+    sort_keys = False
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    @staticmethod
+    def _default(value):
+        if isinstance(value, decimal.Decimal):
+            # NaN/Infinity 的 exponent 是字符串，且JSON中没有对应的值
+            if not value.is_finite():
+                return None
+            return int(value) if value.as_tuple().exponent >= 0 else float(value)
+        if value is pd.NaT:
+            return None
+        if isinstance(value, (datetime.date, datetime.time)):
+            # pandas.Timestamp 等 datetime 子类
+            return value.isoformat()
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, (set, frozenset)):
+            return list(value)
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    def _encode(self, obj, float_digits=None):
+        if float_digits is None:
+            float_digits = self._app.config.get('JSON_FLOAT_DIGITS')
+        if float_digits is not None:
+            obj = round_floats(obj, float_digits)
+        option = self.option | orjson.OPT_SORT_KEYS if self.sort_keys else self.option
+        return orjson.dumps(obj, default=self._default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj, kwargs.get('float_digits')).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._encode(obj), mimetype=self.mimetype)
+
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+# 全局浮点数保留位数，None 表示原样输出
+app.config['JSON_FLOAT_DIGITS'] = None
 CORS(app, resources={r"/*": {
     "origins": ["http://localhost:3000", "http://10.130.126.249:3000", "*"],  # 添加通配符允许所有来源
     "methods": ["GET", "POST", "DELETE", "PUT", "OPTIONS"],
@@ -44,11 +144,127 @@ logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %
 @app.before_request
 def log_request_info():
     app.logger.debug('Headers: %s', request.headers)
-    app.logger.debug('Body: %s', request.get_data())
+    # 文件上传的请求体不读入内存记录日志，交给表单解析按流处理
+    if request.mimetype != 'multipart/form-data':
+        app.logger.debug('Body: %s', request.get_data())
     app.logger.debug('Origin: %s', request.origin)
     app.logger.debug('Path: %s', request.path)
     app.logger.debug('Method: %s', request.method)
 
+# 响应压缩：按 Accept-Encoding 协商，小于阈值的响应不压缩
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html'}
+# 可缓存压缩结果的接口（数据只在导入时变化）
+COMPRESSION_CACHE_ENDPOINTS = {
+    'get_available_periods', 'get_provinces', 'get_basins', 'get_water_quality_stats',
+    'get_quality_category_statistics', 'get_province_basin_list', 'get_province_basin_sectionname_list',
+    'fish_statistics'
+}
+COMPRESSION_CACHE_SIZE = 64
+
+
+class Compressor:
+    """统一 gzip/brotli/zstd 的增量压缩接口"""
+
+    def __init__(self, encoding):
+        level = COMPRESSION_LEVELS[encoding]
+        if encoding == 'gzip':
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self.compress, self.flush = self._obj.compress, lambda: self._obj.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = self._obj.flush
+        elif encoding == 'br':
+            self._obj = brotli.Compressor(quality=level)
+            self.compress, self.flush, self.finish = self._obj.process, self._obj.flush, self._obj.finish
+        else:
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+            self.compress = self._obj.compress
+            self.flush = lambda: self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self.finish = self._obj.flush
+
+
+def supported_encodings():
+    """按优先顺序返回服务端可用的压缩算法"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+class CompressedBodyCache:
+    """按 (压缩算法, 响应体摘要) 缓存压缩结果，LRU淘汰"""
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, encoding, body):
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        with self._lock:
+            compressed = self._items.get(key)
+            if compressed is not None:
+                self._items.move_to_end(key)
+                return compressed
+        compressor = Compressor(encoding)
+        compressed = compressor.compress(body) + compressor.finish()
+        with self._lock:
+            self._items[key] = compressed
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return compressed
+
+
+compressed_body_cache = CompressedBodyCache(COMPRESSION_CACHE_SIZE)
+
+
+def compress_stream(iterable, chunks, encoding):
+    """逐块压缩流式响应，每块后flush以便客户端及时收到数据"""
+    compressor = Compressor(encoding)
+    try:
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush()
+        yield compressor.finish()
+    finally:
+        # 关闭原始生成器，使其中的 finally（如归还数据库连接）得以执行
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+@app.after_request
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(supported_encodings())
+    if not encoding:
+        return response
+
+    if response.is_streamed:
+        original = response.response
+        response.response = compress_stream(original, response.iter_encoded(), encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_SIZE:
+            return response
+        if request.method == 'GET' and request.endpoint in COMPRESSION_CACHE_ENDPOINTS:
+            compressed = compressed_body_cache.get_or_compress(encoding, body)
+        else:
+            compressor = Compressor(encoding)
+            compressed = compressor.compress(body) + compressor.finish()
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    return response
+
 # 配置允许的文件上传类型
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 
@@ -62,9 +278,111 @@ DB_CONFIG = {
     'password': '123456',  # 请更改为你的数据库密码
     'db': 'oceanmonitor',
     'charset': 'utf8mb4',
-    'cursorclass': pymysql.cursors.DictCursor
+    'cursorclass': pymysql.cursors.DictCursor,
+    # 批量上传使用 LOAD DATA LOCAL INFILE
+    'local_infile': True
 }
 
+# 连接池配置
+POOL_CONFIG = {
+    'max_size': 10,         # 最大连接数
+    'max_lifetime': 1800,   # 连接最长存活时间(秒)，超过后回收重建
+    'timeout': 10           # 获取连接的最长等待时间(秒)
+}
+
+
+class ConnectionPool:
+    """线程安全的有界数据库连接池"""
+
+    def __init__(self, db_config, max_size=10, max_lifetime=1800, timeout=10):
+        self.db_config = db_config
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._created_at = {}
+        self._lock = threading.Lock()
+
+    def _create(self):
+        conn = pymysql.connect(**self.db_config)
+        with self._lock:
+            self._created_at[id(conn)] = time.time()
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, conn):
+        """检出时的健康检查：超过存活时间或ping失败的连接不再复用"""
+        created_at = self._created_at.get(id(conn), 0)
+        if time.time() - created_at > self.max_lifetime:
+            return False
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """检出一个可用连接，池满时最多等待 timeout 秒"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RuntimeError("数据库连接池已耗尽，请稍后重试")
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._create()
+                if self._is_usable(conn):
+                    return conn
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, discard=False):
+        """归还连接，回滚未提交的事务以免下一次检出读到旧快照"""
+        try:
+            if discard or not conn.open:
+                self._discard(conn)
+                return
+            try:
+                conn.rollback()
+            except Exception:
+                self._discard(conn)
+                return
+            self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            self.release(conn, discard=not conn.open)
+            raise
+        else:
+            self.release(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+db_pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+
 # 根路由 - 展示所有API端点
 @app.route('/', methods=['GET'])
 def home():
@@ -75,12 +393,16 @@ def home():
             "水质监测": [
                 "/api/water-quality - 获取水质数据",
                 "/api/water-quality/periods - 获取可用时间段",
+                "/api/water-quality/periods/refresh - 刷新可用时间段目录 (POST)",
                 "/api/water-quality/provinces - 获取所有省份",
                 "/api/water-quality/basins - 获取所有流域",
-                "/api/water-quality/statistics - 获取水质统计数据"
+                "/api/water-quality/statistics - 获取水质统计数据",
+                "/api/water-quality/range - 跨月份时间范围查询",
+                "/api/batch - 批量执行多个查询 (POST)"
             ],
             "鱼类数据": [
-                "/api/fish-statistics - 获取鱼类统计数据"
+                "/api/fish-statistics - 获取鱼类统计数据",
+                "/api/fish-statistics/rebuild - 重建鱼类统计 (POST)"
             ],
             "用户管理": [
                 "/api/register - 用户注册 (POST)",
@@ -117,41 +439,476 @@ def home():
         }
     })
 
-# 数据库连接函数
-def get_db_connection():
-    return pymysql.connect(**DB_CONFIG)
+# 数据库连接函数：从连接池检出连接，with块结束（包括异常和提前return）时自动归还
+def db_connection():
+    return db_pool.connection()
 
-def get_fish_statistics():
-    conn = get_db_connection()
-    with conn.cursor() as cursor:
-        cursor.execute("SELECT * FROM fishes")
-        fish_data = cursor.fetchall()
-    conn.close()
-    
-    # 将结果转换为DataFrame
-    fish_df = pd.DataFrame(fish_data)
-    
-    # 如果数据库中有数据，使用数据库数据
-    if not fish_df.empty:
-        # 1. 各种鱼的数量统计
-        species_count = fish_df['species'].value_counts().to_dict()
-        
-        # 2. 各种鱼的平均重量
-        weight_avg = fish_df.groupby('species')['weight'].mean().to_dict()
-        
-        # 3. 鱼的长度与重量关系数据
-        length_weight_data = fish_df[['species', 'length1', 'weight']].to_dict('records')
-        
-        # 4. 各种鱼的体型比例（长度/高度）
-        proportion = (fish_df['length1'] / fish_df['height']).groupby(fish_df['species']).mean().to_dict()
-        
+# 水质月度表目录刷新间隔(秒)
+CATALOG_TTL = 60
+
+# 水质月度表字段（与 create_water_quality_table_if_not_exists 建表顺序一致）
+WATER_QUALITY_FIELDS = [
+    'province', 'basin', 'section_name', 'monitor_time', 'water_quality_category',
+    'water_temperature', 'pH', 'dissolved_oxygen', 'conductivity', 'turbidity',
+    'permanganate_index', 'ammonia_nitrogen', 'total_phosphorus', 'total_nitrogen',
+    'chlorophyll_a', 'algae_density', 'station_status'
+]
+
+# 水质月度表字段类型，与 scripts/import_data.py 中 LABEL_TABLE 一致
+WATER_QUALITY_COLUMN_TYPES = {
+    field: 'VARCHAR' for field in ['province', 'basin', 'section_name', 'water_quality_category', 'station_status']
+}
+WATER_QUALITY_COLUMN_TYPES['monitor_time'] = 'DATETIME'
+WATER_QUALITY_COLUMN_TYPES.update(
+    (field, 'FLOAT') for field in WATER_QUALITY_FIELDS if field not in WATER_QUALITY_COLUMN_TYPES
+)
+
+# 水质月度表索引：按断面查最新数据、按水质类别统计、按 (监测时间, 断面) 游标分页
+WATER_QUALITY_INDEXES = {
+    'idx_section_time': ['province', 'basin', 'section_name', 'monitor_time'],
+    'idx_category': ['water_quality_category'],
+    'idx_time_section': ['monitor_time', 'section_name']
+}
+# 上传去重的唯一键：同一断面同一监测时间只保留一条
+WATER_QUALITY_UNIQUE_KEY = ('uk_section_time', ['section_name', 'monitor_time'])
+
+
+def is_period_table(table_name):
+    """判断表名是否为水质月度表 (格式: YYYY-MM)"""
+    if len(table_name) != 7 or table_name[4] != '-':
+        return False
+    try:
+        year = int(table_name[:4])
+        month = int(table_name[5:])
+    except ValueError:
+        return False
+    return 2000 <= year <= 2100 and 1 <= month <= 12
+
+
+class PeriodCatalog:
+    """水质月度表目录：首次使用时加载，按TTL刷新，建表后立即更新"""
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._tables = None
+        self._loaded_at = 0
+        # 已确认存在的月度表，插入数据时只查这个集合
+        self._known = set()
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SHOW TABLES")
+                rows = cursor.fetchall()
+        return sorted(name for name in (list(row.values())[0] for row in rows) if is_period_table(name))
+
+    def tables(self):
+        """按时间升序返回所有月度表名"""
+        with self._lock:
+            if self._tables is None or time.time() - self._loaded_at > self.ttl:
+                self._tables = self._load()
+                self._loaded_at = time.time()
+            return list(self._tables)
+
+    def latest(self):
+        tables = self.tables()
+        return tables[-1] if tables else None
+
+    def periods(self):
+        return [{"year": int(name[:4]), "month": int(name[5:])} for name in self.tables()]
+
+    def contains(self, table_name):
+        """月度表是否存在：已确认过的表直接查内存集合，否则查目录"""
+        if table_name in self._known:
+            return True
+        if table_name in self.tables():
+            with self._lock:
+                self._known.add(table_name)
+            return True
+        return False
+
+    def add(self, table_name):
+        """登记新建的月度表，无需等待下一次刷新"""
+        with self._lock:
+            self._known.add(table_name)
+            if self._tables is not None and table_name not in self._tables:
+                self._tables = sorted(self._tables + [table_name])
+
+    def invalidate(self):
+        with self._lock:
+            self._tables = None
+            self._known = set()
+
+
+period_catalog = PeriodCatalog(ttl=CATALOG_TTL)
+
+
+def _insert_sorted_key(mapping, key, value):
+    """向按键有序的 dict 插入新键并保持有序，返回该键对应的值"""
+    if key in mapping:
+        return mapping[key]
+    keys = list(mapping)
+    items = list(mapping.items())
+    items.insert(bisect.bisect(keys, key), (key, value))
+    mapping.clear()
+    mapping.update(items)
+    return value
+
+
+class SectionHierarchy:
+    """按月度表缓存的 省份→流域→断面 层级索引，各层按名称有序"""
+
+    def __init__(self):
+        self._periods = {}
+        self._lock = threading.Lock()
+
+    def _load(self, table_name):
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"SELECT DISTINCT province, basin, section_name FROM `{table_name}`")
+                rows = cursor.fetchall()
+        tree = {}
+        for row in rows:
+            tree.setdefault(row['province'], {}).setdefault(row['basin'], set()).add(row['section_name'])
+        return {
+            province: {basin: sorted(sections) for basin, sections in sorted(basins.items())}
+            for province, basins in sorted(tree.items())
+        }
+
+    def _tree(self, table_name):
+        with self._lock:
+            tree = self._periods.get(table_name)
+        if tree is None:
+            tree = self._load(table_name)
+            with self._lock:
+                tree = self._periods.setdefault(table_name, tree)
+        return tree
+
+    def provinces(self, table_name):
+        tree = self._tree(table_name)
+        with self._lock:
+            return list(tree)
+
+    def basins(self, table_name, province=None):
+        tree = self._tree(table_name)
+        with self._lock:
+            if province:
+                return list(tree.get(province, {}))
+            return sorted({basin for basins in tree.values() for basin in basins})
+
+    def province_basins(self, table_name):
+        tree = self._tree(table_name)
+        with self._lock:
+            return [{"province": p, "basin": b} for p, basins in tree.items() for b in basins]
+
+    def sections(self, table_name):
+        tree = self._tree(table_name)
+        with self._lock:
+            return [
+                {"province": p, "basin": b, "section_name": sec}
+                for p, basins in tree.items() for b, sections in basins.items() for sec in sections
+            ]
+
+    def add(self, table_name, province, basin, section_name):
+        """上传新数据后增量登记断面；尚未加载的月份在下次查询时从数据库构建"""
+        if not (province and basin and section_name):
+            return
+        with self._lock:
+            tree = self._periods.get(table_name)
+            if tree is None:
+                return
+            basins = _insert_sorted_key(tree, province, {})
+            sections = _insert_sorted_key(basins, basin, [])
+            index = bisect.bisect_left(sections, section_name)
+            if index == len(sections) or sections[index] != section_name:
+                sections.insert(index, section_name)
+
+    def invalidate(self, table_name=None):
+        with self._lock:
+            if table_name:
+                self._periods.pop(table_name, None)
+            else:
+                self._periods.clear()
+
+
+section_hierarchy = SectionHierarchy()
+
+# 鱼类测量字段
+FISH_MEASURES = ['weight', 'length1', 'length2', 'length3', 'height', 'width']
+# 鱼类表可写入字段与全部字段
+FISH_FIELDS = ['species'] + FISH_MEASURES
+FISH_COLUMNS = ['id'] + FISH_FIELDS
+
+
+def is_blank(value):
+    """上传数据中的空值（None 或空白字符串）不写入数据库"""
+    return value is None or not str(value).strip()
+
+
+class FishStatistics:
+    """按品种维护的鱼类增量统计：各测量值的非空计数、和、平方和，以及体型比例(长度/高度)均值"""
+
+    def __init__(self):
+        self._species = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty_entry():
+        return {
+            'count': 0,
+            'measures': {m: [0, 0.0, 0.0] for m in FISH_MEASURES},
+            'ratio': [0, 0.0]
+        }
+
+    def rebuild(self):
+        """从 fishes 表全量重建（数据库端聚合，只返回每个品种一行）"""
+        measure_exprs = ", ".join(
+            f"COUNT(`{m}`) AS n_{m}, SUM(`{m}`) AS sum_{m}, SUM(`{m}` * `{m}`) AS sq_{m}"
+            for m in FISH_MEASURES
+        )
+        sql = f"""
+            SELECT species, COUNT(*) AS count, {measure_exprs},
+                   COUNT(length1 / NULLIF(height, 0)) AS n_ratio,
+                   SUM(length1 / NULLIF(height, 0)) AS sum_ratio
+            FROM fishes
+            GROUP BY species
+        """
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql)
+                rows = cursor.fetchall()
+
+        species = {}
+        for row in rows:
+            entry = self._empty_entry()
+            entry['count'] = int(row['count'])
+            for m in FISH_MEASURES:
+                entry['measures'][m] = [int(row[f'n_{m}']), float(row[f'sum_{m}'] or 0), float(row[f'sq_{m}'] or 0)]
+            entry['ratio'] = [int(row['n_ratio']), float(row['sum_ratio'] or 0)]
+            species[row['species']] = entry
+
+        with self._lock:
+            self._species = species
+
+    @staticmethod
+    def prepare(data):
+        """把一条待插入的鱼类数据转换为统计增量，数值无法解析时抛出 ValueError"""
+        values = {}
+        for m in FISH_MEASURES:
+            value = data.get(m)
+            # 与 pick_insert_fields 一致：空值不写入
+            values[m] = None if is_blank(value) else float(value)
+        return data.get('species'), values
+
+    def apply(self, delta):
+        """插入成功后累加增量；尚未构建时跳过，下次查询时全量构建"""
+        species, values = delta
+        if not species:
+            return
+        with self._lock:
+            if self._species is None:
+                return
+            entry = self._species.setdefault(species, self._empty_entry())
+            entry['count'] += 1
+            for m, value in values.items():
+                if value is not None:
+                    stats = entry['measures'][m]
+                    stats[0] += 1
+                    stats[1] += value
+                    stats[2] += value * value
+            if values['length1'] is not None and values['height']:
+                entry['ratio'][0] += 1
+                entry['ratio'][1] += values['length1'] / values['height']
+
+    def invalidate(self):
+        with self._lock:
+            self._species = None
+
+    def summary(self):
+        """按品种汇总的统计结果，复杂度与品种数成正比"""
+        with self._lock:
+            species = self._species
+        if species is None:
+            self.rebuild()
+        with self._lock:
+            species = {name: {
+                'count': entry['count'],
+                'measures': {m: list(stats) for m, stats in entry['measures'].items()},
+                'ratio': list(entry['ratio'])
+            } for name, entry in (self._species or {}).items()}
+
+        if not species:
+            return None
+
+        def mean(stats):
+            return stats[1] / stats[0] if stats[0] else None
+
+        def std(stats):
+            if not stats[0]:
+                return None
+            avg = stats[1] / stats[0]
+            return max(stats[2] / stats[0] - avg * avg, 0.0) ** 0.5
+
+        ordered = sorted(species.items(), key=lambda item: item[1]['count'], reverse=True)
         return {
-            'species_count': species_count,
-            'weight_avg': weight_avg,
-            'length_weight': length_weight_data,
-            'proportion': proportion
+            # 1. 各种鱼的数量统计
+            'species_count': {name: entry['count'] for name, entry in ordered},
+            # 2. 各种鱼的平均重量
+            'weight_avg': {name: mean(entry['measures']['weight']) for name, entry in ordered},
+            # 3. 鱼的长度与重量关系（各品种均值）
+            'length_weight': [
+                {'species': name, 'length1': mean(entry['measures']['length1']), 'weight': mean(entry['measures']['weight'])}
+                for name, entry in ordered
+            ],
+            # 4. 各种鱼的体型比例（长度/高度）
+            'proportion': {name: (entry['ratio'][1] / entry['ratio'][0] if entry['ratio'][0] else None) for name, entry in ordered},
+            # 5. 各测量值的均值与标准差
+            'measures': {
+                name: {m: {'mean': mean(stats), 'std': std(stats)} for m, stats in entry['measures'].items()}
+                for name, entry in ordered
+            }
         }
 
+    def averages(self, name):
+        """单个品种各测量值的均值（保留两位小数）与记录数，品种不存在时返回None"""
+        with self._lock:
+            species = self._species
+        if species is None:
+            self.rebuild()
+        with self._lock:
+            entry = (self._species or {}).get(name)
+            if entry is None:
+                return None
+            result = {m: (round(stats[1] / stats[0], 2) if stats[0] else None)
+                      for m, stats in entry['measures'].items()}
+            result['record_count'] = entry['count']
+        return result
+
+
+fish_statistics_store = FishStatistics()
+
+def get_fish_statistics():
+    return fish_statistics_store.summary()
+
+# 游标分页：每页最大行数
+MAX_PAGE_SIZE = 5000
+
+
+def parse_page_limit():
+    """读取 limit 参数；未提供时返回 None 表示不分页，非法值抛出 ValueError"""
+    limit = request.args.get('limit')
+    if limit is None or limit == '':
+        return None
+    limit = int(limit)
+    if limit <= 0:
+        raise ValueError(limit)
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_page_cursor(values):
+    """把排序键编码为不透明游标"""
+    return base64.urlsafe_b64encode(json.dumps(values, ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+
+def decode_page_cursor(token, types):
+    """解码游标并按 types（每个排序键允许的类型）校验结构，不符合时抛出 ValueError"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError(token)
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError(token)
+    for value, allowed in zip(values, types):
+        # bool 是 int 的子类，不能当作 id
+        if isinstance(value, bool) or not isinstance(value, allowed):
+            raise ValueError(token)
+    return values
+
+
+def water_quality_page_cursor(row):
+    """水质数据按 (monitor_time, section_name) 降序分页，取本页最后一行作为下一页游标"""
+    monitor_time = row.get('monitor_time')
+    if isinstance(monitor_time, datetime.datetime):
+        monitor_time = monitor_time.isoformat()
+    return encode_page_cursor([monitor_time, row.get('section_name')])
+
+
+def split_page(rows, limit, cursor_for_row):
+    """查询时多取一行用来判断是否还有下一页，返回 (本页数据, 下一页游标或None)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, cursor_for_row(rows[-1])
+
+
+def add_water_quality_keyset(conditions, params, token):
+    """把游标转换为 WHERE 条件；降序排序时 monitor_time 为 NULL 的行排在最后"""
+    monitor_time, section_name = decode_page_cursor(token, ((str, type(None)), str))
+    if monitor_time is None:
+        conditions.append("(monitor_time IS NULL AND section_name < %s)")
+        params.append(section_name)
+    else:
+        monitor_time = datetime.datetime.fromisoformat(monitor_time)
+        conditions.append("(monitor_time < %s OR (monitor_time = %s AND section_name < %s) OR monitor_time IS NULL)")
+        params.extend([monitor_time, monitor_time, section_name])
+
+
+def parse_fields_param(allowed, required=()):
+    """解析 fields=a,b,c 投影参数：未提供时返回None（查询全部字段），含未知字段时抛出 ValueError"""
+    value = request.args.get('fields')
+    if not value:
+        return None
+    fields = list(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    invalid = [f for f in fields if f not in allowed]
+    if invalid or not fields:
+        raise ValueError(', '.join(invalid))
+    fields.extend(f for f in required if f not in fields)
+    return fields
+
+
+def select_columns(fields):
+    """fields 为None时查询全部字段"""
+    return ", ".join(f"`{f}`" for f in fields) if fields else "*"
+
+
+# 列式响应中做字典编码的字符串字段（取值重复度高）
+COLUMNAR_DICTIONARY_FIELDS = {'province', 'basin', 'section_name', 'water_quality_category', 'station_status'}
+
+
+def wants_columnar():
+    """format=columnar 时返回列式数据"""
+    return request.args.get('format') == 'columnar'
+
+
+def to_columnar(rows, float_digits=None):
+    """把行数据转换为列式结构：每列一个数组，重复字符串按字典编码（编码-1表示空值）"""
+    df = pd.DataFrame.from_records(rows)
+    data = {}
+    dictionaries = {}
+    for column in df.columns:
+        series = df[column]
+        if column in COLUMNAR_DICTIONARY_FIELDS:
+            codes, uniques = pd.factorize(series)
+            data[column] = codes.tolist()
+            dictionaries[column] = uniques.tolist()
+            continue
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = series.dt.strftime('%Y-%m-%dT%H:%M:%S')
+        elif pd.api.types.is_float_dtype(series):
+            values = series.round(float_digits) if float_digits is not None else series
+        else:
+            values = series
+        data[column] = values.astype(object).where(series.notna(), None).tolist()
+    return {
+        "format": "columnar",
+        "columns": list(df.columns),
+        "row_count": len(df),
+        "data": data,
+        "dictionaries": dictionaries
+    }
+
+
 #测试1222
 # 水质监测数据API
 @app.route('/api/water-quality', methods=['GET'])
@@ -166,24 +923,56 @@ def get_water_quality():
         # 构建表名
         table_name = f"{year}-{month}"
         
-        # 构建SQL查询
-        sql = f"SELECT * FROM `{table_name}`"
         conditions = []
+        params = []
         
         if province:
-            conditions.append(f"province = '{province}'")
+            conditions.append("province = %s")
+            params.append(province)
         if basin:
-            conditions.append(f"basin = '{basin}'")
+            conditions.append("basin = %s")
+            params.append(basin)
+        
+        # 提供 limit 时按 (monitor_time, section_name) 游标分页
+        try:
+            limit = parse_page_limit()
+            if limit and request.args.get('cursor'):
+                add_water_quality_keyset(conditions, params, request.args['cursor'])
+        except ValueError:
+            return jsonify({"success": False, "error": "分页参数 limit 或 cursor 无效"}), 400
+        
+        # fields 投影，分页时需要游标字段
+        try:
+            fields = parse_fields_param(WATER_QUALITY_FIELDS, ('monitor_time', 'section_name') if limit else ())
+        except ValueError as e:
+            return jsonify({"success": False, "error": f"未知字段: {e}"}), 400
         
+        # 构建SQL查询
+        sql = f"SELECT {select_columns(fields)} FROM `{table_name}`"
         if conditions:
             sql += " WHERE " + " AND ".join(conditions)
+        if limit:
+            sql += " ORDER BY monitor_time DESC, section_name DESC LIMIT %s"
+            params.append(limit + 1)
         
         # 查询数据库
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute(sql)
-            data = cursor.fetchall()
-        conn.close()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                data = cursor.fetchall()
+        
+        next_cursor = None
+        if limit:
+            data, next_cursor = split_page(data, limit, water_quality_page_cursor)
+        
+        if wants_columnar():
+            result = {"success": True, **to_columnar(data)}
+            if limit:
+                result["next_cursor"] = next_cursor
+            return jsonify(result)
+        
+        if limit:
+            return jsonify({"success": True, "data": data, "next_cursor": next_cursor})
         
         return jsonify({"success": True, "data": data})
     except Exception as e:
@@ -193,24 +982,8 @@ def get_water_quality():
 @app.route('/api/water-quality/periods', methods=['GET'])
 def get_available_periods():
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SHOW TABLES")
-            tables = cursor.fetchall()
-        conn.close()
-        
-        # 过滤出表示年月的表名 (格式: YYYY-MM)
-        periods = []
-        for table in tables:
-            table_name = list(table.values())[0]  # 获取表名
-            if len(table_name) == 7 and table_name[4] == '-':
-                try:
-                    year = int(table_name[:4])
-                    month = int(table_name[5:])
-                    if 2000 <= year <= 2100 and 1 <= month <= 12:
-                        periods.append({"year": year, "month": month})
-                except ValueError:
-                    continue
+        # 从月度表目录读取 (格式: YYYY-MM)
+        periods = period_catalog.periods()
         
         return jsonify({"success": True, "data": periods})
     except Exception as e:
@@ -220,30 +993,13 @@ def get_available_periods():
 @app.route('/api/water-quality/provinces', methods=['GET'])
 def get_provinces():
     try:
-        # 获取最新的表
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SHOW TABLES")
-            tables = cursor.fetchall()
-        
-        # 找到最新的水质表 (假设表名格式为 YYYY-MM)
-        water_tables = []
-        for table in tables:
-            table_name = list(table.values())[0]
-            if len(table_name) == 7 and table_name[4] == '-':
-                water_tables.append(table_name)
-        
-        if not water_tables:
+        # 找到最新的水质表
+        latest_table = period_catalog.latest()
+        if not latest_table:
             return jsonify({"success": False, "error": "No water quality tables found"}), 404
         
-        latest_table = sorted(water_tables)[-1]
-        
-        # 查询所有省份
-        with conn.cursor() as cursor:
-            cursor.execute(f"SELECT DISTINCT province FROM `{latest_table}`")
-            provinces = [item['province'] for item in cursor.fetchall()]
-        
-        conn.close()
+        # 从层级索引读取所有省份
+        provinces = section_hierarchy.provinces(latest_table)
         
         return jsonify({"success": True, "data": provinces})
     except Exception as e:
@@ -253,43 +1009,31 @@ def get_provinces():
 @app.route('/api/water-quality/basins', methods=['GET'])
 def get_basins():
     try:
-        # 获取最新的表
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SHOW TABLES")
-            tables = cursor.fetchall()
-        
-        # 找到最新的水质表 (假设表名格式为 YYYY-MM)
-        water_tables = []
-        for table in tables:
-            table_name = list(table.values())[0]
-            if len(table_name) == 7 and table_name[4] == '-':
-                water_tables.append(table_name)
-        
-        if not water_tables:
+        # 找到最新的水质表
+        latest_table = period_catalog.latest()
+        if not latest_table:
             return jsonify({"success": False, "error": "No water quality tables found"}), 404
         
-        latest_table = sorted(water_tables)[-1]
-        
         # 过滤条件
         province = request.args.get('province')
         
-        # 构建SQL查询
-        sql = f"SELECT DISTINCT basin FROM `{latest_table}`"
-        if province:
-            sql += f" WHERE province = '{province}'"
-        
-        # 查询所有流域
-        with conn.cursor() as cursor:
-            cursor.execute(sql)
-            basins = [item['basin'] for item in cursor.fetchall()]
-        
-        conn.close()
+        # 从层级索引读取流域
+        basins = section_hierarchy.basins(latest_table, province)
         
         return jsonify({"success": True, "data": basins})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+# 刷新月度表目录（供 scripts/import_data.py 导入新月份后调用）
+@app.route('/api/water-quality/periods/refresh', methods=['POST'])
+def refresh_periods():
+    try:
+        period_catalog.invalidate()
+        section_hierarchy.invalidate()
+        return jsonify({"success": True, "data": period_catalog.periods()})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 # 获取水质监测数据统计
 @app.route('/api/water-quality/statistics', methods=['GET'])
 def get_water_quality_stats():
@@ -301,35 +1045,33 @@ def get_water_quality_stats():
         # 构建表名
         table_name = f"{year}-{month}"
         
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            # 水质类别统计
-            cursor.execute(f"SELECT water_quality_category, COUNT(*) as count FROM `{table_name}` GROUP BY water_quality_category")
-            category_stats = cursor.fetchall()
-            
-            # 省份统计
-            cursor.execute(f"SELECT province, COUNT(*) as count FROM `{table_name}` GROUP BY province")
-            province_stats = cursor.fetchall()
-            
-            # 水质指标平均值
-            cursor.execute(f"""
-                SELECT 
-                    AVG(water_temperature) as avg_temperature,
-                    AVG(pH) as avg_ph,
-                    AVG(dissolved_oxygen) as avg_oxygen,
-                    AVG(conductivity) as avg_conductivity,
-                    AVG(turbidity) as avg_turbidity,
-                    AVG(permanganate_index) as avg_permanganate,
-                    AVG(ammonia_nitrogen) as avg_ammonia,
-                    AVG(total_phosphorus) as avg_phosphorus,
-                    AVG(total_nitrogen) as avg_nitrogen,
-                    AVG(chlorophyll_a) as avg_chlorophyll,
-                    AVG(algae_density) as avg_algae
-                FROM `{table_name}`
-            """)
-            metrics_avg = cursor.fetchone()
-        
-        conn.close()
+        avg_columns = ", ".join(
+            f"SUM(`sum_{ind}`) / NULLIF(SUM(row_count) - SUM(`null_{ind}`), 0) AS {alias}"
+            for ind, alias in ROLLUP_INDICATORS.items()
+        )
+        
+        # 从统计汇总表读取，无需扫描整张月度表
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                ensure_period_rollup(conn, cursor, table_name)
+                
+                # 水质类别统计
+                cursor.execute(f"""
+                    SELECT NULLIF(category, '') AS water_quality_category, CAST(SUM(row_count) AS SIGNED) AS count
+                    FROM `{ROLLUP_TABLE}` WHERE period = %s GROUP BY category
+                """, (table_name,))
+                category_stats = cursor.fetchall()
+                
+                # 省份统计
+                cursor.execute(f"""
+                    SELECT province, CAST(SUM(row_count) AS SIGNED) AS count
+                    FROM `{ROLLUP_TABLE}` WHERE period = %s GROUP BY province
+                """, (table_name,))
+                province_stats = cursor.fetchall()
+                
+                # 水质指标平均值
+                cursor.execute(f"SELECT {avg_columns} FROM `{ROLLUP_TABLE}` WHERE period = %s", (table_name,))
+                metrics_avg = cursor.fetchone()
         
         return jsonify({
             "success": True, 
@@ -364,6 +1106,14 @@ def fish_statistics():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/fish-statistics/rebuild', methods=['POST'])
+def rebuild_fish_statistics():
+    try:
+        fish_statistics_store.rebuild()
+        return jsonify({"success": True, "data": get_fish_statistics()})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @app.route('/api/online-market', methods=['GET'])
 def get_online_market():
     try:
@@ -507,21 +1257,20 @@ def register():
         return jsonify({"success": False, "error": "请提供完整的用户信息"}), 400
     
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            # 检查用户名是否已经存在
-            cursor.execute("SELECT username FROM users WHERE username = %s", (username,))
-            if cursor.fetchone():
-                return jsonify({"success": False, "error": "用户名已存在"}), 400
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                # 检查用户名是否已经存在
+                cursor.execute("SELECT username FROM users WHERE username = %s", (username,))
+                if cursor.fetchone():
+                    return jsonify({"success": False, "error": "用户名已存在"}), 400
+                
+                # 创建新用户
+                cursor.execute(
+                    "INSERT INTO users (username, password, gender, age, role, unit) VALUES (%s, %s, %s, %s, %s, %s)",
+                    (username, password, gender, age, role, unit)
+                )
             
-            # 创建新用户
-            cursor.execute(
-                "INSERT INTO users (username, password, gender, age, role, unit) VALUES (%s, %s, %s, %s, %s, %s)",
-                (username, password, gender, age, role, unit)
-            )
-        
-        conn.commit()
-        conn.close()
+            conn.commit()
         return jsonify({"success": True, "message": "注册成功"}), 201
     except Exception as e:
         app.logger.error(f"Error during registration: {e}")
@@ -541,13 +1290,11 @@ def login():
         return jsonify({"success": False, "error": "缺少用户名或密码"}), 400
     
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            # 查找用户
-            cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-            user = cursor.fetchone()
-        
-        conn.close()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                # 查找用户
+                cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+                user = cursor.fetchone()
         
         if not user:
             return jsonify({"success": False, "error": "用户名不存在"}), 400
@@ -574,11 +1321,10 @@ def login():
 @app.route('/api/users', methods=['GET'])
 def get_users():
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT username, gender, age, role, unit FROM users")
-            users = cursor.fetchall()
-        conn.close()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT username, gender, age, role, unit FROM users")
+                users = cursor.fetchall()
         
         return jsonify({"success": True, "data": users})
     except Exception as e:
@@ -591,23 +1337,22 @@ def delete_user(username):
         return jsonify({"success": False, "message": "权限不足，只有管理员可以删除用户"}), 403
 
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            # 根据用户名查找用户
-            cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-            user = cursor.fetchone()
-            
-            if not user:
-                return jsonify({"success": False, "message": "用户未找到"}), 404
-            
-            if user['role'] == 'admin':  # 不允许删除管理员账号
-                return jsonify({"success": False, "message": "不能删除管理员账号"}), 403
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                # 根据用户名查找用户
+                cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+                user = cursor.fetchone()
+                
+                if not user:
+                    return jsonify({"success": False, "message": "用户未找到"}), 404
+                
+                if user['role'] == 'admin':  # 不允许删除管理员账号
+                    return jsonify({"success": False, "message": "不能删除管理员账号"}), 403
+                
+                # 删除用户
+                cursor.execute("DELETE FROM users WHERE username = %s", (username,))
             
-            # 删除用户
-            cursor.execute("DELETE FROM users WHERE username = %s", (username,))
-        
-        conn.commit()
-        conn.close()
+            conn.commit()
         
         return jsonify({"success": True, "message": "用户已删除"})
     except Exception as e:
@@ -622,38 +1367,36 @@ def update_user(username):
         return jsonify({"success": False, "message": "权限不足，只有管理员可以修改用户信息"}), 403
 
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            # 根据用户名查找用户
-            cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-            user = cursor.fetchone()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                # 根据用户名查找用户
+                cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+                user = cursor.fetchone()
+                
+                if not user:
+                    return jsonify({"success": False, "message": "用户未找到"}), 404
+                
+                # 更新用户信息
+                cursor.execute(
+                    """UPDATE users 
+                       SET username = %s, gender = %s, age = %s, role = %s, unit = %s 
+                       WHERE username = %s""",
+                    (
+                        data.get("username", user["username"]),
+                        data.get("gender", user["gender"]),
+                        data.get("age", user["age"]),
+                        data.get("role", user["role"]),
+                        data.get("unit", user["unit"]),
+                        username
+                    )
+                )
             
-            if not user:
-                return jsonify({"success": False, "message": "用户未找到"}), 404
+            conn.commit()
             
-            # 更新用户信息
-            cursor.execute(
-                """UPDATE users 
-                   SET username = %s, gender = %s, age = %s, role = %s, unit = %s 
-                   WHERE username = %s""",
-                (
-                    data.get("username", user["username"]),
-                    data.get("gender", user["gender"]),
-                    data.get("age", user["age"]),
-                    data.get("role", user["role"]),
-                    data.get("unit", user["unit"]),
-                    username
-                )
-            )
-        
-        conn.commit()
-        
-        # 获取更新后的用户数据
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM users WHERE username = %s", (data.get("username", username),))
-            updated_user = cursor.fetchone()
-        
-        conn.close()
+            # 获取更新后的用户数据
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT * FROM users WHERE username = %s", (data.get("username", username),))
+                updated_user = cursor.fetchone()
         
         return jsonify({
             "success": True, 
@@ -673,11 +1416,10 @@ def update_user(username):
 @app.route('/api/get_user/<username>', methods=['GET'])
 def get_user(username):
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT username, gender, age, role, unit FROM users WHERE username = %s", (username,))
-            user = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT username, gender, age, role, unit FROM users WHERE username = %s", (username,))
+                user = cursor.fetchone()
         
         if user:
             return jsonify({"success": True, "user": user})
@@ -822,11 +1564,10 @@ def get_current_status():
             params.append(section_name)
 
         # 查询数据库
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute(sql, params)
-            row = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
 
         if not row:
             return jsonify({"success": False, "error": "No data found"}), 404
@@ -872,31 +1613,17 @@ def get_province_basin_sectionname_list():
         month = request.args.get('month', '05')
         table_name = f"{year}-{month}"
 
-        sql = f"""
-            SELECT DISTINCT province, basin,section_name
-            FROM `{table_name}`
-            ORDER BY province, basin,section_name
-        """
-        app.logger.info(f"Executing SQL: {sql}") 
-          
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute(sql)
-            rows = cursor.fetchall()
-        conn.close()
-        app.logger.info(f"Query result: {rows}")  
+        # 从层级索引读取
+        result = section_hierarchy.sections(table_name)
         
-        if not rows:
+        if not result:
             app.logger.error("No data found")
             return jsonify({"success": False, "error": "No data found"}), 404
 
-        # 构建返回结果
-        result = [{"province": row["province"], "basin": row["basin"],"section_name":row["section_name"]} for row in rows]  # 使用字段名访问数据
         return jsonify({"success": True, "data": result})
 
     except Exception as e:
         app.logger.error(f"Error during query execution: {str(e)}")
-        app.logger.error(f"Query result: {rows}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
@@ -906,32 +1633,17 @@ def get_province_basin_list():
         year = request.args.get('year', '2025')
         month = request.args.get('month', '05')
         table_name = f"{year}-{month}"
-        sql = f"""
-            SELECT DISTINCT province, basin
-            FROM `{table_name}`
-            ORDER BY province, basin
-        """
-        app.logger.info(f"Executing SQL: {sql}")  # 打印 SQL 查询日志
-          
-        # 连接数据库并执行查询
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute(sql)
-            rows = cursor.fetchall()
-        conn.close()
-        app.logger.info(f"Query result: {rows}")  # 打印查询结果
+        # 从层级索引读取
+        result = section_hierarchy.province_basins(table_name)
         
-        if not rows:
+        if not result:
             app.logger.error("No data found")
             return jsonify({"success": False, "error": "No data found"}), 404
 
-        # 构建返回结果
-        result = [{"province": row["province"], "basin": row["basin"]} for row in rows]  # 使用字段名访问数据
         return jsonify({"success": True, "data": result})
 
     except Exception as e:
         app.logger.error(f"Error during query execution: {str(e)}")
-        app.logger.error(f"Query result: {rows}")
         return jsonify({"success": False, "error": str(e)}), 500
     
 
@@ -939,19 +1651,18 @@ def get_province_basin_list():
 def get_fish_species_list():
     try:
         # 连接数据库并执行查询
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            # 查询所有不重复的鱼类品种
-            sql = """
-                SELECT DISTINCT species
-                FROM `fishes`
-                ORDER BY species
-            """
-            app.logger.info(f"Executing SQL: {sql}") 
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                # 查询所有不重复的鱼类品种
+                sql = """
+                    SELECT DISTINCT species
+                    FROM `fishes`
+                    ORDER BY species
+                """
+                app.logger.info(f"Executing SQL: {sql}") 
             
-            cursor.execute(sql)
-            rows = cursor.fetchall()
-        conn.close()
+                cursor.execute(sql)
+                rows = cursor.fetchall()
         app.logger.info(f"Query result: {rows}")  
         
         if not rows:
@@ -969,48 +1680,71 @@ def get_fish_species_list():
 
 @app.route('/api/fishes/species-data', methods=['GET'])
 def get_fish_species_data():
-    conn = None
     try:
         species = request.args.get('species')
         if not species:
             return jsonify({"success": False, "error": "Species parameter is required"}), 400
 
+        try:
+            limit = parse_page_limit()
+            after_id = decode_page_cursor(request.args['cursor'], (int,))[0] if limit and request.args.get('cursor') else None
+        except ValueError:
+            return jsonify({"success": False, "error": "分页参数 limit 或 cursor 无效"}), 400
+
+        # fields 投影，分页时需要 id 作为游标
+        try:
+            fields = parse_fields_param(FISH_COLUMNS, ('id',) if limit else ()) or FISH_COLUMNS
+        except ValueError as e:
+            return jsonify({"success": False, "error": f"未知字段: {e}"}), 400
+
         # 获取数据库连接
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            sql = """
-                SELECT 
-                    species,
-                    weight,
-                    length1,
-                    length2,
-                    length3,
-                    height,
-                    width
-                FROM fishes 
-                WHERE species = %s
-            """
-            app.logger.info(f"Executing SQL: {sql} with species: {species}")
-            cursor.execute(sql, (species,))
-            rows = cursor.fetchall()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                sql = f"""
+                    SELECT {select_columns(fields)}
+                    FROM fishes 
+                    WHERE species = %s
+                """
+                params = [species]
+                # 提供 limit 时按主键游标分页
+                if limit:
+                    if after_id is not None:
+                        sql += " AND id > %s"
+                        params.append(after_id)
+                    sql += " ORDER BY id LIMIT %s"
+                    params.append(limit + 1)
+                app.logger.info(f"Executing SQL: {sql} with species: {species}")
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
 
         if not rows:
             return jsonify({"success": False, "error": f"No data found for species: {species}"}), 404
 
+        if limit:
+            # 分页时平均值取全品种的累计统计，而不是当前页
+            rows, next_cursor = split_page(rows, limit, lambda row: encode_page_cursor([row['id']]))
+            return jsonify({
+                "success": True,
+                "species": species,
+                "records": rows,
+                "averages": fish_statistics_store.averages(species),
+                "next_cursor": next_cursor,
+                "units": {
+                    "weight": "grams",
+                    "length": "cm",
+                    "height": "cm",
+                    "width": "cm"
+                }
+            })
+
         # 计算平均值
         def safe_mean(values):
             clean_values = [v for v in values if v is not None]
             return round(sum(clean_values)/len(clean_values), 2) if clean_values else None
 
-        averages = {
-            "weight": safe_mean([r['weight'] for r in rows]),
-            "length1": safe_mean([r['length1'] for r in rows]),
-            "length2": safe_mean([r['length2'] for r in rows]),
-            "length3": safe_mean([r['length3'] for r in rows]),
-            "height": safe_mean([r['height'] for r in rows]),
-            "width": safe_mean([r['width'] for r in rows]),
-            "record_count": len(rows)
-        }
+        # 未投影的测量值平均值为None
+        averages = {m: (safe_mean([r[m] for r in rows]) if m in fields else None) for m in FISH_MEASURES}
+        averages["record_count"] = len(rows)
 
         return jsonify({
             "success": True,
@@ -1028,12 +1762,6 @@ def get_fish_species_data():
     except Exception as e:
         app.logger.error(f"Error during query execution: {str(e)}")
         return jsonify({"success": False, "error": str(e)}), 500
-    finally:
-        if conn and conn.open:  # 只有连接存在且未关闭时才关闭
-            try:
-                conn.close()
-            except Exception as e:
-                app.logger.warning(f"Error closing connection: {str(e)}")
     
 
 @app.route('/api/water-quality/current_data', methods=['GET'])
@@ -1048,7 +1776,7 @@ def get_current_data():
 
         # 构造SQL语句
         sql = f"""
-            SELECT dissolved_oxygen, ammonia_nitrogen, pH, total_phosphorus, water_temperature, section_name
+            SELECT dissolved_oxygen, ammonia_nitrogen, pH, total_phosphorus, water_temperature, section_name, monitor_time
             FROM `{table_name}`
         """
         conditions = []
@@ -1058,10 +1786,6 @@ def get_current_data():
         if basin:
             conditions.append("basin = %s")
 
-        if conditions:
-            sql += " WHERE " + " AND ".join(conditions)
-        sql += " ORDER BY monitor_time DESC"
-
         # 构建参数列表
         params = []
         if province:
@@ -1069,21 +1793,39 @@ def get_current_data():
         if basin:
             params.append(basin)
 
+        try:
+            limit = parse_page_limit()
+            if limit and request.args.get('cursor'):
+                add_water_quality_keyset(conditions, params, request.args['cursor'])
+        except ValueError:
+            return jsonify({"success": False, "error": "分页参数 limit 或 cursor 无效"}), 400
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if limit:
+            sql += " ORDER BY monitor_time DESC, section_name DESC LIMIT %s"
+            params.append(limit + 1)
+        else:
+            sql += " ORDER BY monitor_time DESC"
+
         app.logger.info(f"SQL Query: {sql}")
         app.logger.info(f"Params: {params}")
 
         # 查询数据库
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute(sql, params)
-            rows = cursor.fetchall()  # 获取所有的结果
-        conn.close()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()  # 获取所有的结果
 
         app.logger.info(f"Query result: {rows}")
 
         if not rows:
             return jsonify({"success": False, "error": "No data found"}), 404
-        
+
+        next_cursor = None
+        if limit:
+            rows, next_cursor = split_page(rows, limit, water_quality_page_cursor)
+
         # 将多个记录格式化为字典列表
         results = []
         for row in rows:
@@ -1098,6 +1840,9 @@ def get_current_data():
             }
             results.append(result)
 
+        if limit:
+            return jsonify({"success": True, "data": results, "next_cursor": next_cursor})
+
         return jsonify({"success": True, "data": results})
 
     except Exception as e:
@@ -1107,7 +1852,6 @@ def get_current_data():
 
 @app.route('/api/fishes/weight-stats', methods=['GET'])
 def get_fish_weight_stats():
-    conn = None
     try:
         species = request.args.get('species')
         if not species:
@@ -1147,55 +1891,41 @@ def get_fish_weight_stats():
 
         app.logger.info(f"Executing SQL: {sql} with species: {species}")
 
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute(sql, (species,))
-            row = cursor.fetchone()
-
-            if not row:
-                return jsonify({"success": False, "error": f"No data found for species: {species}"}), 404
-
-            # 处理查询结果，确保所有值都是整数
-            processed_row = {}
-            for key, value in row.items():
-                # 处理可能的None值
-                if value is None:
-                    processed_row[key] = 0
-                # 处理数值类型（包括Decimal和普通数字）
-                elif isinstance(value, (int, float)):
-                    processed_row[key] = int(value)
-                # 尝试将其他类型转换为整数
-                else:
-                    try:
-                        processed_row[key] = int(value)
-                    except (ValueError, TypeError):
-                        processed_row[key] = 0
-                        app.logger.warning(f"Failed to convert {key} value: {value}")
-
-            # 映射数据库字段到前端显示名称
-            weight_mapping = {
-                "under_100": "<100g",
-                "_100_to_300": "100-300g",
-                "_300_to_500": "300-500g",
-                "_500_to_700": "500-700g",
-                "_700_to_1000": "700-1000g",
-                "_1000_to_1500": "1000-1500g",
-                "over_1500": ">1500g"
-            }
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, (species,))
+                row = cursor.fetchone()
 
-            # 填充体重分布数据
-            for db_key, display_key in weight_mapping.items():
-                result["weight_distribution"][display_key] = processed_row[db_key]
+        if not row:
+            return jsonify({"success": False, "error": f"No data found for species: {species}"}), 404
 
-            # 设置总记录数
-            result["total_count"] = processed_row["total_count"]
+        # SUM 结果为 Decimal（COALESCE 保证非空），由JSON序列化转换为整数
+        processed_row = row
+
+        # 映射数据库字段到前端显示名称
+        weight_mapping = {
+            "under_100": "<100g",
+            "_100_to_300": "100-300g",
+            "_300_to_500": "300-500g",
+            "_500_to_700": "500-700g",
+            "_700_to_1000": "700-1000g",
+            "_1000_to_1500": "1000-1500g",
+            "over_1500": ">1500g"
+        }
 
-            # 生成饼图数据（过滤掉数量为0的区间）
-            result["chart_data"] = [
-                {"name": display_key, "value": count}
-                for db_key, display_key in weight_mapping.items()
-                if (count := processed_row[db_key]) > 0
-            ]
+        # 填充体重分布数据
+        for db_key, display_key in weight_mapping.items():
+            result["weight_distribution"][display_key] = processed_row[db_key]
+
+        # 设置总记录数
+        result["total_count"] = processed_row["total_count"]
+
+        # 生成饼图数据（过滤掉数量为0的区间）
+        result["chart_data"] = [
+            {"name": display_key, "value": count}
+            for db_key, display_key in weight_mapping.items()
+            if (count := processed_row[db_key]) > 0
+        ]
         print(result)
         return jsonify(result)
        
@@ -1203,12 +1933,6 @@ def get_fish_weight_stats():
     except Exception as e:
         app.logger.error(f"Error in get_fish_weight_stats: {str(e)}", exc_info=True)
         return jsonify({"success": False, "error": "Internal server error"}), 500
-    finally:
-        if conn:
-            try:
-                conn.close()
-            except Exception as e:
-                app.logger.warning(f"Error closing connection: {str(e)}")
 
 
 @app.route('/api/water-quality/category-statistics', methods=['GET'])
@@ -1221,11 +1945,11 @@ def get_quality_category_statistics():
 
         table_name = f"{year}-{month}"
 
-        # 构造SQL语句
+        # 构造SQL语句（读取统计汇总表）
         sql = f"""
-            SELECT water_quality_category, COUNT(*) as count
-            FROM `{table_name}`
-            WHERE water_quality_category IS NOT NULL
+            SELECT category AS water_quality_category, CAST(SUM(row_count) AS SIGNED) as count
+            FROM `{ROLLUP_TABLE}`
+            WHERE period = %s AND category <> ''
         """
         conditions = []
 
@@ -1236,10 +1960,10 @@ def get_quality_category_statistics():
 
         if conditions:
             sql += " AND " + " AND ".join(conditions)
-        sql += " GROUP BY water_quality_category"
+        sql += " GROUP BY category"
 
         # 构建参数列表
-        params = []
+        params = [table_name]
         if province:
             params.append(province)
         if basin:
@@ -1249,11 +1973,11 @@ def get_quality_category_statistics():
         app.logger.info(f"Params: {params}")
 
         # 查询数据库
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute(sql, params)
-            rows = cursor.fetchall()
-        conn.close()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                ensure_period_rollup(conn, cursor, table_name)
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
 
         app.logger.info(f"Query result: {rows}")
 
@@ -1293,7 +2017,6 @@ def get_full_data():
 
         table_name = f"{year}-{month}"
 
-        sql = f"SELECT * FROM `{table_name}`"
         conditions = []
         params = []
 
@@ -1304,19 +2027,45 @@ def get_full_data():
             conditions.append("basin = %s")
             params.append(basin)
 
+        stream_mode = request.args.get('stream')
+
+        # 提供 limit 时按 (monitor_time, section_name) 游标分页（流式模式不分页）
+        limit = None
+        if stream_mode != 'ndjson':
+            try:
+                limit = parse_page_limit()
+                if limit and request.args.get('cursor'):
+                    add_water_quality_keyset(conditions, params, request.args['cursor'])
+            except ValueError:
+                return jsonify({"success": False, "error": "分页参数 limit 或 cursor 无效"}), 400
+
+        # fields 投影，分页时需要游标字段
+        try:
+            fields = parse_fields_param(WATER_QUALITY_FIELDS, ('monitor_time', 'section_name') if limit else ())
+        except ValueError as e:
+            return jsonify({"success": False, "error": f"未知字段: {e}"}), 400
+
+        sql = f"SELECT {select_columns(fields)} FROM `{table_name}`"
         if conditions:
             sql += " WHERE " + " AND ".join(conditions)
 
-        sql += " ORDER BY monitor_time DESC"
+        if limit:
+            sql += " ORDER BY monitor_time DESC, section_name DESC LIMIT %s"
+            params.append(limit + 1)
+        else:
+            sql += " ORDER BY monitor_time DESC"
 
         app.logger.info(f"Executing SQL: {sql}")
         app.logger.info(f"SQL Parameters: {params}")
 
-        conn = get_db_connection()
-        with conn.cursor(DictCursor) as cursor:  
-            cursor.execute(sql, params)
-            rows = cursor.fetchall()
-        conn.close()
+        # stream=ndjson：服务端游标按批读取，每行一个JSON对象，边查边返回
+        if stream_mode == 'ndjson':
+            return stream_full_data_ndjson(sql, params)
+
+        with db_connection() as conn:
+            with conn.cursor(DictCursor) as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
 
         # 检查是否误把表头写进了数据表中
         if rows and list(rows[0].keys()) == list(rows[0].values()):
@@ -1326,33 +2075,265 @@ def get_full_data():
         if not rows:
             return jsonify({"success": False, "error": "No data found"}), 404
 
-        data = []
-        for row in rows:
-            app.logger.info(f"Processing row: {row}")
-            row_data = {}
+        next_cursor = None
+        if limit:
+            rows, next_cursor = split_page(rows, limit, water_quality_page_cursor)
+
+        # format=columnar：按列整体转换，空值为null
+        if wants_columnar():
+            result = {"success": True, **to_columnar(rows, float_digits=2)}
+            if limit:
+                result["next_cursor"] = next_cursor
+            return jsonify(result)
+
+        # 时间和浮点数交给JSON序列化处理，这里只替换空值
+        data = [format_full_data_row(row) for row in rows]
+
+        result = {"success": True, "data": data}
+        if limit:
+            result["next_cursor"] = next_cursor
+
+        return Response(app.json.dumps(result, float_digits=2), mimetype='application/json')
+
+    except Exception as e:
+        app.logger.error(f"Error fetching full data: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+def format_full_data_row(row):
+    """get_full_data 的单元格格式：空值为N/A（时间和浮点数位数由JSON序列化处理）"""
+    return {column_name: "N/A" if value is None else value for column_name, value in row.items()}
+
+def stream_full_data_ndjson(sql, params):
+    query = StreamingQuery(sql, params)
+    first_batch = query.first_batch
+
+    if not first_batch:
+        query.close()
+        return jsonify({"success": False, "error": "No data found"}), 404
+
+    # 检查是否误把表头写进了数据表中
+    if list(first_batch[0].keys()) == list(first_batch[0].values()):
+        app.logger.warning("Detected header row inside data rows. Removing the first row.")
+        del first_batch[0]
+
+    def generate():
+        try:
+            for rows in query.batches():
+                yield "".join(app.json.dumps(format_full_data_row(row), float_digits=2) + "\n" for row in rows)
+        finally:
+            query.close()
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    # 生成器未开始迭代（客户端提前断开等）时 finally 不会执行，由响应关闭时归还连接
+    response.call_on_close(query.close)
+    return response
+
+# 流式查询每批从服务端游标读取的行数
+STREAM_BATCH_SIZE = 1000
+
+
+class StreamingQuery:
+    """在服务端游标(SSDictCursor)上执行查询并按批产出行，读完或 close() 时归还连接
+
+    构造时即执行查询并读取第一批，SQL错误会在返回响应之前抛出，调用方也能据此判断结果是否为空。
+    """
+
+    def __init__(self, sql, params, batch_size=STREAM_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._conn = db_pool.acquire()
+        try:
+            self._cursor = self._conn.cursor(SSDictCursor)
+            self._cursor.execute(sql, params)
+            self.description = self._cursor.description
+            self.first_batch = self._cursor.fetchmany(batch_size)
+        except Exception:
+            db_pool.release(self._conn, discard=True)
+            self._conn = None
+            raise
+
+    def batches(self):
+        try:
+            if self.first_batch:
+                yield self.first_batch
+            while self._conn is not None:
+                rows = self._cursor.fetchmany(self.batch_size)
+                if not rows:
+                    self._finish(completed=True)
+                    break
+                yield rows
+        finally:
+            self.close()
+
+    def _finish(self, completed):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if completed:
+            self._cursor.close()
+            db_pool.release(conn)
+        else:
+            # 未读完的服务端游标会占住连接，直接丢弃而不是逐行读空
+            db_pool.release(conn, discard=True)
+
+    def close(self):
+        self._finish(completed=False)
+
+
+def parse_range_bound(value):
+    """解析 YYYY-MM 或 YYYY-MM-DD[ HH:MM[:SS]] 格式的范围参数，返回 (月度表名, 精确时间或None)"""
+    value = value.strip()
+    if len(value) == 7:
+        if not is_period_table(value):
+            raise ValueError(value)
+        return value, None
+    moment = datetime.datetime.fromisoformat(value)
+    return f"{moment.year}-{moment.month:02d}", moment
+
+
+@app.route('/api/water-quality/range', methods=['GET'])
+def get_water_quality_range():
+    """跨月度表查询时间范围内的水质数据，一次UNION ALL查询，按监测时间升序流式返回"""
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        province = request.args.get('province')
+        basin = request.args.get('basin')
+        section_name = request.args.get('section_name')
+
+        if not start or not end:
+            return jsonify({"success": False, "error": "缺少参数 start 或 end"}), 400
+
+        try:
+            start_table, start_time = parse_range_bound(start)
+            end_table, end_time = parse_range_bound(end)
+        except ValueError:
+            return jsonify({"success": False, "error": "时间格式应为 YYYY-MM 或 YYYY-MM-DD HH:MM:SS"}), 400
+
+        if start_table > end_table:
+            return jsonify({"success": False, "error": "start 不能晚于 end"}), 400
+
+        # 合并结果需要按 monitor_time 排序
+        try:
+            fields = parse_fields_param(WATER_QUALITY_FIELDS, ('monitor_time',)) or list(WATER_QUALITY_FIELDS)
+        except ValueError as e:
+            return jsonify({"success": False, "error": f"未知字段: {e}"}), 400
+
+        # 按范围裁剪月度表
+        tables = [t for t in period_catalog.tables() if start_table <= t <= end_table]
+        if not tables:
+            return jsonify({"success": False, "error": "No data found"}), 404
+
+        conditions = []
+        params = []
+        if province:
+            conditions.append("province = %s")
+            params.append(province)
+        if basin:
+            conditions.append("basin = %s")
+            params.append(basin)
+        if section_name:
+            conditions.append("section_name = %s")
+            params.append(section_name)
+        if start_time:
+            conditions.append("monitor_time >= %s")
+            params.append(start_time)
+        if end_time:
+            conditions.append("monitor_time <= %s")
+            params.append(end_time)
+
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        columns = ", ".join(f"`{f}`" for f in fields)
+        sql = " UNION ALL ".join(
+            f"(SELECT {columns}, '{t}' AS period FROM `{t}`{where})" for t in tables
+        ) + " ORDER BY monitor_time"
+
+        app.logger.info(f"Executing SQL: {sql}")
+
+        query = StreamingQuery(sql, params * len(tables))
+
+        def generate():
             try:
-                for column_name, value in row.items():
-                    app.logger.info(f"Processing field: {column_name} with value: {value} ({type(value)})")
+                yield '{"success": true, "periods": ' + app.json.dumps(tables) + ', "data": ['
+                first = True
+                for rows in query.batches():
+                    # 整批序列化后去掉首尾的方括号
+                    chunk = app.json.dumps(rows, float_digits=2)[1:-1]
+                    if not chunk:
+                        continue
+                    yield chunk if first else "," + chunk
+                    first = False
+                yield ']}'
+            finally:
+                query.close()
+
+        response = Response(stream_with_context(generate()), mimetype='application/json')
+        response.call_on_close(query.close)
+        return response
 
-                    if isinstance(value, datetime.datetime):
-                        value = value.isoformat()
-                    elif value is None:
-                        value = "N/A"
-                    elif isinstance(value, float):
-                        value = round(value, 2)
+    except Exception as e:
+        app.logger.error(f"Error fetching range data: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
 
-                    row_data[column_name] = value
+# 批量查询：单次请求的子查询上限与并发线程数（每个线程从连接池取连接）
+BATCH_MAX_QUERIES = 20
+BATCH_MAX_WORKERS = 4
+# 返回流式或文件响应的接口，不允许作为子请求（执行前拒绝，避免白跑查询）
+BATCH_STREAMING_PATHS = ('/api/water-quality/range',)
+BATCH_STREAMING_PREFIXES = ('/api/export/',)
+
+
+def run_batch_query(query):
+    """在独立的请求上下文中调用已有的GET接口，返回 (状态码, 响应JSON)"""
+    path = query.get('path') or ''
+    params = query.get('params') or {}
+    if not path.startswith('/api/') or path.startswith('/api/batch'):
+        return 400, {"success": False, "error": f"不支持的子请求路径: {path}"}
+    if (path.rstrip('/') in BATCH_STREAMING_PATHS or path.startswith(BATCH_STREAMING_PREFIXES)
+            or (isinstance(params, dict) and params.get('stream'))):
+        return 400, {"success": False, "error": f"子请求不支持流式或非JSON响应: {path}"}
+
+    with app.test_request_context(path, method='GET', query_string=params):
+        try:
+            response = app.make_response(app.dispatch_request())
+        except HTTPException as e:
+            return e.code, {"success": False, "error": e.description}
+        except Exception as e:
+            app.logger.error(f"Batch sub-query {path} failed: {str(e)}")
+            return 500, {"success": False, "error": str(e)}
 
-                data.append(row_data)
+        if response.is_streamed or not response.is_json:
+            response.close()
+            return 400, {"success": False, "error": f"子请求不支持流式或非JSON响应: {path}"}
+        return response.status_code, response.get_json()
 
-            except Exception as e:
-                app.logger.error(f"Error processing row: {row} - Error: {str(e)}")
-                continue
 
-        return jsonify({"success": True, "data": data})
+@app.route('/api/batch', methods=['POST'])
+def batch_query():
+    """一次请求执行多个只读子查询，互不依赖的子查询并发执行，结果按提交顺序返回
+
+    请求体: {"queries": [{"id": "stats", "path": "/api/water-quality/category-statistics", "params": {...}}, ...]}
+    """
+    try:
+        payload = request.get_json(silent=True) or {}
+        queries = payload.get('queries')
+        if not isinstance(queries, list) or not queries:
+            return jsonify({"success": False, "error": "queries 必须是非空数组"}), 400
+        if len(queries) > BATCH_MAX_QUERIES:
+            return jsonify({"success": False, "error": f"单次最多 {BATCH_MAX_QUERIES} 个子查询"}), 400
+        if not all(isinstance(query, dict) for query in queries):
+            return jsonify({"success": False, "error": "子查询格式应为 {id, path, params}"}), 400
+
+        with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(queries))) as executor:
+            outcomes = list(executor.map(run_batch_query, queries))
+
+        results = [
+            {"id": query.get('id', index), "status": status, "body": body}
+            for index, (query, (status, body)) in enumerate(zip(queries, outcomes))
+        ]
+        return jsonify({"success": True, "results": results})
 
     except Exception as e:
-        app.logger.error(f"Error fetching full data: {str(e)}")
+        app.logger.error(f"Error running batch query: {str(e)}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 # 获取本机无线局域网适配器IP地址
@@ -1701,6 +2682,172 @@ def get_city_lnglat():
             "exception": str(e)
         }), 500
 
+def export_attachment_headers(filename):
+    """下载文件名（非ASCII文件名按 RFC 5987 编码）"""
+    fallback = filename.encode('ascii', 'ignore').decode('ascii') or 'export'
+    return {"Content-Disposition": f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{urllib.parse.quote(filename)}"}
+
+
+def stream_csv_export(sql, params, filename, empty_error):
+    """服务端游标按批读取并直接编码为CSV写入响应体（带BOM以兼容Excel），不生成临时文件"""
+    query = StreamingQuery(sql, params)
+    if not query.first_batch:
+        query.close()
+        return jsonify({"success": False, "error": empty_error}), 404
+
+    columns = list(query.first_batch[0].keys())
+
+    def generate():
+        try:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            writer.writerow(columns)
+            yield '\ufeff' + buffer.getvalue()
+            for rows in query.batches():
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([row[column] for column in columns] for row in rows)
+                yield buffer.getvalue()
+        finally:
+            query.close()
+
+    response = Response(stream_with_context(generate()), mimetype='text/csv',
+                        headers=export_attachment_headers(filename))
+    response.call_on_close(query.close)
+    return response
+
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# 文件导出在内存中缓冲的上限，超过后转存到临时文件
+EXPORT_SPOOL_SIZE = 16 * 1024 * 1024
+
+
+def append_query_sheet(workbook, title, query):
+    """把流式查询结果按批写入只写模式的工作表，查询为空时不建表；返回是否写入"""
+    if not query.first_batch:
+        query.close()
+        return False
+    sheet = workbook.create_sheet(title=title)
+    columns = list(query.first_batch[0].keys())
+    sheet.append(columns)
+    for rows in query.batches():
+        for row in rows:
+            sheet.append([row[column] for column in columns])
+    return True
+
+
+def send_workbook(workbook, filename):
+    """工作簿写入本次请求独占的 SpooledTemporaryFile 后发送"""
+    buffer = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE)
+    workbook.save(buffer)
+    buffer.seek(0)
+    return send_file(buffer, as_attachment=True, download_name=filename, mimetype=XLSX_MIMETYPE)
+
+
+def stream_xlsx_export(sql, params, filename, empty_error):
+    """openpyxl 只写模式按批写入，内存占用与数据量无关"""
+    workbook = Workbook(write_only=True)
+    if not append_query_sheet(workbook, 'Sheet1', StreamingQuery(sql, params)):
+        return jsonify({"success": False, "error": empty_error}), 404
+    return send_workbook(workbook, filename)
+
+
+# Parquet/Arrow 导出：每批行数（即Parquet行组大小）与压缩算法
+ARROW_BATCH_SIZE = 65536
+ARROW_COMPRESSION = 'zstd'
+ARROW_MIMETYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file'
+}
+
+
+# 结果集列类型 (cursor.description 中的 type_code) 对应的 Arrow 类型，未列出的按字符串处理
+ARROW_FIELD_TYPES = {
+    FIELD_TYPE.TINY: 'int64', FIELD_TYPE.SHORT: 'int64', FIELD_TYPE.INT24: 'int64',
+    FIELD_TYPE.LONG: 'int64', FIELD_TYPE.LONGLONG: 'int64', FIELD_TYPE.YEAR: 'int64',
+    FIELD_TYPE.FLOAT: 'float32', FIELD_TYPE.DOUBLE: 'float64',
+    # DECIMAL 各批的小数位数可能不同，统一转为 float64
+    FIELD_TYPE.DECIMAL: 'float64', FIELD_TYPE.NEWDECIMAL: 'float64',
+    FIELD_TYPE.DATETIME: 'timestamp', FIELD_TYPE.TIMESTAMP: 'timestamp',
+    FIELD_TYPE.DATE: 'date', FIELD_TYPE.NEWDATE: 'date', FIELD_TYPE.TIME: 'duration',
+}
+
+
+def arrow_field(column, type_code):
+    """水质字段按建表类型确定列类型，其他字段按结果集的列类型确定；字符串列做字典编码"""
+    sql_type = WATER_QUALITY_COLUMN_TYPES.get(column)
+    if sql_type == 'DATETIME':
+        arrow_type = pa.timestamp('s')
+    elif sql_type == 'FLOAT':
+        arrow_type = pa.float32()
+    elif sql_type == 'VARCHAR':
+        arrow_type = pa.string()
+    else:
+        arrow_type = {
+            'int64': pa.int64(),
+            'float32': pa.float32(),
+            'float64': pa.float64(),
+            'timestamp': pa.timestamp('us'),
+            'date': pa.date32(),
+            'duration': pa.duration('us'),
+        }.get(ARROW_FIELD_TYPES.get(type_code), pa.string())
+    if pa.types.is_string(arrow_type):
+        arrow_type = pa.dictionary(pa.int32(), pa.string())
+    return pa.field(column, arrow_type)
+
+
+def rows_to_record_batch(rows, schema):
+    arrays = []
+    for field in schema:
+        values = [row[field.name] for row in rows]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        elif pa.types.is_floating(field.type):
+            arrays.append(pa.array([float(v) if isinstance(v, decimal.Decimal) else v for v in values], field.type))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def arrow_export(sql, params, filename, export_format, empty_error):
+    """按批转换为带类型的 Arrow RecordBatch，写成压缩的 Parquet 或 Arrow IPC 文件"""
+    if pa is None:
+        return jsonify({"success": False, "error": "服务器未安装 pyarrow，无法导出 parquet/arrow 格式"}), 400
+
+    query = StreamingQuery(sql, params, batch_size=ARROW_BATCH_SIZE)
+    if not query.first_batch:
+        query.close()
+        return jsonify({"success": False, "error": empty_error}), 404
+
+    schema = pa.schema([arrow_field(column[0], column[1]) for column in query.description])
+    buffer = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE)
+
+    if export_format == 'parquet':
+        with pq.ParquetWriter(buffer, schema, compression=ARROW_COMPRESSION) as writer:
+            for rows in query.batches():
+                writer.write_table(pa.Table.from_batches([rows_to_record_batch(rows, schema)]))
+    else:
+        # IPC文件格式要求各批共用同一个字典，先合并再统一字典写出
+        table = pa.Table.from_batches(
+            [rows_to_record_batch(rows, schema) for rows in query.batches()], schema=schema
+        ).unify_dictionaries()
+        options = pa.ipc.IpcWriteOptions(compression=ARROW_COMPRESSION)
+        with pa.ipc.new_file(buffer, schema, options=options) as writer:
+            writer.write_table(table)
+
+    buffer.seek(0)
+    return send_file(buffer, as_attachment=True, download_name=filename, mimetype=ARROW_MIMETYPES[export_format])
+
+
+def export_query(sql, params, filename_prefix, export_format, empty_error):
+    """按 format 参数选择导出方式，默认CSV"""
+    if export_format == 'excel' or export_format == 'xlsx':
+        return stream_xlsx_export(sql, params, f"{filename_prefix}.xlsx", empty_error)
+    if export_format in ARROW_MIMETYPES:
+        return arrow_export(sql, params, f"{filename_prefix}.{export_format}", export_format, empty_error)
+    return stream_csv_export(sql, params, f"{filename_prefix}.csv", empty_error)
+
+
 # 数据导出相关API
 @app.route('/api/export/water-quality', methods=['GET'])
 def export_water_quality():
@@ -1716,31 +2863,26 @@ def export_water_quality():
         # 构建表名
         table_name = f"{year}-{month}"
         
+        try:
+            fields = parse_fields_param(WATER_QUALITY_FIELDS)
+        except ValueError as e:
+            return jsonify({"success": False, "error": f"未知字段: {e}"}), 400
+        
         # 构建SQL查询
-        sql = f"SELECT * FROM `{table_name}`"
+        sql = f"SELECT {select_columns(fields)} FROM `{table_name}`"
         conditions = []
+        params = []
         
         if province:
-            conditions.append(f"province = '{province}'")
+            conditions.append("province = %s")
+            params.append(province)
         if basin:
-            conditions.append(f"basin = '{basin}'")
+            conditions.append("basin = %s")
+            params.append(basin)
         
         if conditions:
             sql += " WHERE " + " AND ".join(conditions)
         
-        # 查询数据库
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute(sql)
-            data = cursor.fetchall()
-        conn.close()
-        
-        if not data:
-            return jsonify({"success": False, "error": "没有找到数据"}), 404
-        
-        # 转换为DataFrame
-        df = pd.DataFrame(data)
-        
         # 生成文件名
         filename_prefix = f"water_quality_{year}_{month}"
         if province:
@@ -1749,24 +2891,7 @@ def export_water_quality():
             filename_prefix += f"_{basin}"
         
         # 根据格式导出
-        if export_format == 'excel' or export_format == 'xlsx':
-            filename = f"{filename_prefix}.xlsx"
-            output = df.to_excel(filename, index=False, engine='openpyxl')
-            return send_file(
-                filename,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        else:  # CSV格式
-            filename = f"{filename_prefix}.csv"
-            df.to_csv(filename, index=False, encoding='utf-8-sig')
-            return send_file(
-                filename,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='text/csv'
-            )
+        return export_query(sql, params, filename_prefix, export_format, "没有找到数据")
             
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -1776,42 +2901,17 @@ def export_fish_data():
     """导出鱼类数据"""
     try:
         export_format = request.args.get('format', 'csv').lower()
-        
-        # 查询鱼类数据
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM fishes")
-            data = cursor.fetchall()
-        conn.close()
-        
-        if not data:
-            return jsonify({"success": False, "error": "没有找到鱼类数据"}), 404
-        
-        # 转换为DataFrame
-        df = pd.DataFrame(data)
+        try:
+            fields = parse_fields_param(FISH_COLUMNS) or FISH_COLUMNS
+        except ValueError as e:
+            return jsonify({"success": False, "error": f"未知字段: {e}"}), 400
+        sql = f"SELECT {select_columns(fields)} FROM fishes"
         
         # 生成文件名
         filename_prefix = "fish_data"
         
         # 根据格式导出
-        if export_format == 'excel' or export_format == 'xlsx':
-            filename = f"{filename_prefix}.xlsx"
-            df.to_excel(filename, index=False, engine='openpyxl')
-            return send_file(
-                filename,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        else:  # CSV格式
-            filename = f"{filename_prefix}.csv"
-            df.to_csv(filename, index=False, encoding='utf-8-sig')
-            return send_file(
-                filename,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='text/csv'
-            )
+        return export_query(sql, [], filename_prefix, export_format, "没有找到鱼类数据")
             
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -1826,41 +2926,17 @@ def export_species_data():
         if not species:
             return jsonify({"success": False, "error": "请指定鱼类品种"}), 400
         
-        # 查询特定品种的鱼类数据
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM fishes WHERE species = %s", (species,))
-            data = cursor.fetchall()
-        conn.close()
-        
-        if not data:
-            return jsonify({"success": False, "error": f"没有找到{species}的数据"}), 404
-        
-        # 转换为DataFrame
-        df = pd.DataFrame(data)
+        try:
+            fields = parse_fields_param(FISH_COLUMNS) or FISH_COLUMNS
+        except ValueError as e:
+            return jsonify({"success": False, "error": f"未知字段: {e}"}), 400
+        sql = f"SELECT {select_columns(fields)} FROM fishes WHERE species = %s"
         
         # 生成文件名
         filename_prefix = f"{species}_data"
         
         # 根据格式导出
-        if export_format == 'excel' or export_format == 'xlsx':
-            filename = f"{filename_prefix}.xlsx"
-            df.to_excel(filename, index=False, engine='openpyxl')
-            return send_file(
-                filename,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        else:  # CSV格式
-            filename = f"{filename_prefix}.csv"
-            df.to_csv(filename, index=False, encoding='utf-8-sig')
-            return send_file(
-                filename,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='text/csv'
-            )
+        return export_query(sql, [species], filename_prefix, export_format, f"没有找到{species}的数据")
             
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -1874,42 +2950,14 @@ def export_users():
         # 这里应该添加权限检查，但为了简化，暂时跳过
         # 在实际应用中，应该验证用户的管理员权限
         
-        # 查询用户数据
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            # 不导出密码字段
-            cursor.execute("SELECT username, gender, age, role, unit FROM users")
-            data = cursor.fetchall()
-        conn.close()
-        
-        if not data:
-            return jsonify({"success": False, "error": "没有找到用户数据"}), 404
-        
-        # 转换为DataFrame
-        df = pd.DataFrame(data)
+        # 不导出密码字段
+        sql = "SELECT username, gender, age, role, unit FROM users"
         
         # 生成文件名
         filename_prefix = "users_data"
         
         # 根据格式导出
-        if export_format == 'excel' or export_format == 'xlsx':
-            filename = f"{filename_prefix}.xlsx"
-            df.to_excel(filename, index=False, engine='openpyxl')
-            return send_file(
-                filename,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        else:  # CSV格式
-            filename = f"{filename_prefix}.csv"
-            df.to_csv(filename, index=False, encoding='utf-8-sig')
-            return send_file(
-                filename,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='text/csv'
-            )
+        return export_query(sql, [], filename_prefix, export_format, "没有找到用户数据")
             
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -1939,53 +2987,32 @@ def export_comprehensive_report():
         
         elif export_format == 'excel' or export_format == 'xlsx':
             filename = f"comprehensive_report_{year}_{month}.xlsx"
+            workbook = Workbook(write_only=True)
             
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                # 工作表1：水质原始数据
-                conn = get_db_connection()
-                with conn.cursor() as cursor:
-                    cursor.execute(f"SELECT * FROM `{table_name}` LIMIT 1000")
-                    water_data = cursor.fetchall()
-                    
-                if water_data:
-                    water_df = pd.DataFrame(water_data)
-                    water_df.to_excel(writer, sheet_name='水质原始数据', index=False)
-                
-                # 工作表2：水质统计数据
-                with conn.cursor() as cursor:
-                    cursor.execute(f"""
-                        SELECT 
-                            water_quality_category, 
-                            COUNT(*) as count,
-                            AVG(water_temperature) as avg_temperature,
-                            AVG(pH) as avg_ph,
-                            AVG(dissolved_oxygen) as avg_oxygen
-                        FROM `{table_name}` 
-                        GROUP BY water_quality_category
-                    """)
-                    stats_data = cursor.fetchall()
-                    
-                if stats_data:
-                    stats_df = pd.DataFrame(stats_data)
-                    stats_df.to_excel(writer, sheet_name='水质统计分析', index=False)
-                
-                # 工作表3：鱼类数据
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT * FROM fishes")
-                    fish_data = cursor.fetchall()
-                    
-                if fish_data:
-                    fish_df = pd.DataFrame(fish_data)
-                    fish_df.to_excel(writer, sheet_name='鱼类数据', index=False)
-                
-                conn.close()
+            # 工作表1：水质原始数据
+            written = append_query_sheet(workbook, '水质原始数据',
+                               StreamingQuery(f"SELECT * FROM `{table_name}` LIMIT 1000", []))
             
-            return send_file(
-                filename,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
+            # 工作表2：水质统计数据
+            written |= append_query_sheet(workbook, '水质统计分析', StreamingQuery(f"""
+                SELECT 
+                    water_quality_category, 
+                    COUNT(*) as count,
+                    AVG(water_temperature) as avg_temperature,
+                    AVG(pH) as avg_ph,
+                    AVG(dissolved_oxygen) as avg_oxygen
+                FROM `{table_name}` 
+                GROUP BY water_quality_category
+            """, []))
+            
+            # 工作表3：鱼类数据
+            written |= append_query_sheet(workbook, '鱼类数据',
+                                          StreamingQuery(f"SELECT {select_columns(FISH_COLUMNS)} FROM fishes", []))
+            
+            # 没有任何工作表的文件 Excel 无法打开
+            if not written:
+                return jsonify({"success": False, "error": "没有可导出的数据"}), 404
+            return send_workbook(workbook, filename)
         else:
             return jsonify({"success": False, "error": "支持的格式：pdf, excel"}), 400
             
@@ -2024,11 +3051,10 @@ def generate_pdf_report(year, month, table_name, filename):
         water_data = None
         water_stats = {}
         try:
-            conn = get_db_connection()
-            with conn.cursor() as cursor:
-                cursor.execute(f"SELECT * FROM `{table_name}` LIMIT 1000")
-                water_data = cursor.fetchall()
-            conn.close()
+            with db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"SELECT * FROM `{table_name}` LIMIT 1000")
+                    water_data = cursor.fetchall()
             
             if water_data:
                 water_df = pd.DataFrame(water_data)
@@ -2051,11 +3077,10 @@ def generate_pdf_report(year, month, table_name, filename):
         fish_data = None
         fish_stats = {}
         try:
-            conn = get_db_connection()
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT * FROM fishes LIMIT 500")
-                fish_data = cursor.fetchall()
-            conn.close()
+            with db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"SELECT {select_columns(FISH_COLUMNS)} FROM fishes LIMIT 500")
+                    fish_data = cursor.fetchall()
             
             if fish_data:
                 fish_df = pd.DataFrame(fish_data)
@@ -2457,7 +3482,7 @@ def generate_pdf_report(year, month, table_name, filename):
             print(f"应急报告也失败了: {str(emergency_error)}")
             return jsonify({"success": False, "error": error_msg}), 500
 
-# 数据上传相关API
+# 数据上传相关API：请求只保存数据并创建后台任务，立即返回任务ID，进度通过 /api/jobs/<job_id> 查询
 @app.route('/api/upload/data', methods=['POST'])
 def upload_data():
     """上传单条或多条数据"""
@@ -2469,46 +3494,12 @@ def upload_data():
         if not data_type or not upload_data:
             return jsonify({"success": False, "error": "缺少数据类型或数据内容"}), 400
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        success_count = 0
-        error_count = 0
-        errors = []
-        
-        for item in upload_data:
-            try:
-                if data_type == 'water_quality':
-                    success = insert_water_quality_data(cursor, item)
-                elif data_type == 'fish_data':
-                    success = insert_fish_data(cursor, item)
-                else:
-                    return jsonify({"success": False, "error": "不支持的数据类型"}), 400
-                
-                if success:
-                    success_count += 1
-                else:
-                    error_count += 1
-                    errors.append(f"数据插入失败: {item}")
-                    
-            except Exception as e:
-                error_count += 1
-                errors.append(f"处理数据时出错: {str(e)}")
-        
-        conn.commit()
-        conn.close()
-        
-        result = {
-            "success": error_count == 0,
-            "message": f"成功上传 {success_count} 条数据",
-            "success_count": success_count,
-            "error_count": error_count
-        }
-        
-        if errors and len(errors) <= 5:  # 只返回前5个错误
-            result["errors"] = errors[:5]
+        if data_type not in UPLOAD_SCHEMAS:
+            return jsonify({"success": False, "error": "不支持的数据类型"}), 400
         
-        return jsonify(result)
+        job_id = upload_jobs.submit(data_type, 'json', lambda path: save_upload_records(path, upload_data),
+                                    total_rows=len(upload_data))
+        return jsonify({"success": True, "job_id": job_id, "message": f"已提交 {len(upload_data)} 条数据，正在后台写入"}), 202
         
     except Exception as e:
         return jsonify({"success": False, "error": f"数据上传失败: {str(e)}"}), 500
@@ -2524,153 +3515,633 @@ def upload_csv_data():
         if not data_type or not csv_data:
             return jsonify({"success": False, "error": "缺少数据类型或数据内容"}), 400
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        success_count = 0
-        error_count = 0
-        
-        for item in csv_data:
-            try:
-                # 移除ID字段
-                if 'id' in item:
-                    del item['id']
-                
-                if data_type == 'water_quality':
-                    success = insert_water_quality_data(cursor, item)
-                elif data_type == 'fish_data':
-                    success = insert_fish_data(cursor, item)
-                else:
-                    return jsonify({"success": False, "error": "不支持的数据类型"}), 400
-                
-                if success:
-                    success_count += 1
-                else:
-                    error_count += 1
-                    
-            except Exception as e:
-                error_count += 1
-        
-        conn.commit()
-        conn.close()
+        if data_type not in UPLOAD_SCHEMAS:
+            return jsonify({"success": False, "error": "不支持的数据类型"}), 400
         
-        return jsonify({
-            "success": error_count == 0,
-            "message": f"批量上传完成，成功 {success_count} 条，失败 {error_count} 条",
-            "success_count": success_count,
-            "error_count": error_count
-        })
+        job_id = upload_jobs.submit(data_type, 'json', lambda path: save_upload_records(path, csv_data),
+                                    total_rows=len(csv_data))
+        return jsonify({"success": True, "job_id": job_id, "message": f"已提交 {len(csv_data)} 条数据，正在后台写入"}), 202
         
     except Exception as e:
         return jsonify({"success": False, "error": f"CSV数据上传失败: {str(e)}"}), 500
 
-def insert_water_quality_data(cursor, data):
-    """插入水质数据到数据库"""
+@app.route('/api/upload/csv-file', methods=['POST'])
+def upload_csv_file():
+    """multipart 上传CSV文件：保存文件后由后台任务分块解析、按列转换类型并批量插入"""
     try:
-        # 获取当前年月来确定表名
-        monitor_time = data.get('monitor_time')
-        
-        if monitor_time:
-            # 从时间中提取年月
-            from datetime import datetime
-            dt = datetime.fromisoformat(monitor_time.replace('Z', '+00:00'))
-            table_name = f"{dt.year}-{dt.month:02d}"
-        else:
-            # 如果没有时间，使用当前时间
-            from datetime import datetime
-            now = datetime.now()
-            table_name = f"{now.year}-{now.month:02d}"
-        
-        # 创建表（如果不存在）
-        create_water_quality_table_if_not_exists(cursor, table_name)
-        
-        # 准备插入数据
-        fields = []
-        values = []
-        placeholders = []
-        
-        # 定义字段映射
-        field_mapping = {
-            'province': 'province',
-            'basin': 'basin', 
-            'section_name': 'section_name',
-            'monitor_time': 'monitor_time',
-            'water_quality_category': 'water_quality_category',
-            'water_temperature': 'water_temperature',
-            'pH': 'pH',
-            'dissolved_oxygen': 'dissolved_oxygen',
-            'conductivity': 'conductivity',
-            'turbidity': 'turbidity',
-            'permanganate_index': 'permanganate_index',
-            'ammonia_nitrogen': 'ammonia_nitrogen',
-            'total_phosphorus': 'total_phosphorus',
-            'total_nitrogen': 'total_nitrogen',
-            'chlorophyll_a': 'chlorophyll_a',
-            'algae_density': 'algae_density',
-            'station_status': 'station_status'
-        }
+        data_type = request.form.get('dataType')
+        csv_file = request.files.get('file')
         
-        for key, db_field in field_mapping.items():
-            if key in data and data[key] and str(data[key]).strip():
-                fields.append(db_field)
-                values.append(data[key])
-                placeholders.append('%s')
+        if not data_type or not csv_file:
+            return jsonify({"success": False, "error": "缺少数据类型或CSV文件"}), 400
         
-        if not fields:
-            return False
+        if data_type not in UPLOAD_SCHEMAS:
+            return jsonify({"success": False, "error": "不支持的数据类型"}), 400
         
-        query = f"INSERT INTO `{table_name}` ({', '.join(fields)}) VALUES ({', '.join(placeholders)})"
-        cursor.execute(query, values)
-        return True
+        job_id = upload_jobs.submit(data_type, 'csv', csv_file.save, filename=secure_filename(csv_file.filename or ''))
+        return jsonify({"success": True, "job_id": job_id, "message": "文件已上传，正在后台解析写入"}), 202
         
     except Exception as e:
-        return False
+        return jsonify({"success": False, "error": f"CSV文件上传失败: {str(e)}"}), 500
 
-def insert_fish_data(cursor, data):
-    """插入鱼类数据到数据库"""
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_upload_job(job_id):
+    """查询上传任务的进度：已处理行数、每秒行数、新增/更新/跳过条数、错误和是否完成"""
     try:
-        # 准备插入数据
-        fields = []
-        values = []
-        placeholders = []
-        
-        # 定义字段映射
-        field_mapping = {
-            'species': 'species',
-            'weight': 'weight',
-            'length1': 'length1',
-            'length2': 'length2',
-            'length3': 'length3',
-            'height': 'height',
-            'width': 'width'
-        }
-        
-        for key, db_field in field_mapping.items():
-            if key in data and data[key] and str(data[key]).strip():
-                fields.append(db_field)
-                values.append(data[key])
-                placeholders.append('%s')
-        
-        if not fields:
-            return False
-        
-        query = f"INSERT INTO fishes ({', '.join(fields)}) VALUES ({', '.join(placeholders)})"
-        cursor.execute(query, values)
-        return True
-        
+        job = upload_jobs.get(job_id)
+        if job is None:
+            return jsonify({"success": False, "error": "任务不存在"}), 404
+        return jsonify({"success": True, "data": job})
     except Exception as e:
-        return False
+        return jsonify({"success": False, "error": str(e)}), 500
+
+# CSV文件上传时每次解析和插入的行数
+UPLOAD_CHUNK_ROWS = 5000
+UPLOAD_SCHEMAS = {'water_quality': WATER_QUALITY_FIELDS, 'fish_data': FISH_FIELDS}
+UPLOAD_NUMERIC_FIELDS = {
+    field for field, sql_type in WATER_QUALITY_COLUMN_TYPES.items() if sql_type == 'FLOAT'
+} | set(FISH_MEASURES)
+
+
+def coerce_upload_chunk(chunk, data_type):
+    """按列批量转换一块CSV数据的类型，返回 (有效记录, 对应的CSV行号, 无效行 [(行号, 错误信息)])"""
+    columns = [column for column in chunk.columns if column in UPLOAD_SCHEMAS[data_type]]
+    text = chunk[columns].apply(lambda series: series.str.strip())
+    blank = text.isna() | (text == '')
+    # 每行第一个无法转换的单元格，用于错误信息
+    reasons = pd.Series(None, index=chunk.index, dtype=object)
+    typed = {}
+    for column in columns:
+        if column in UPLOAD_NUMERIC_FIELDS:
+            values = pd.to_numeric(text[column], errors='coerce')
+        elif column == 'monitor_time':
+            # 同一列中允许混用不同的 ISO 8601 写法，不按第一个值推断格式
+            values = pd.to_datetime(text[column], errors='coerce', format='ISO8601').dt.strftime('%Y-%m-%dT%H:%M:%S')
+        else:
+            values = text[column]
+        # 非空但无法转换的单元格使整行无效
+        bad = values.isna() & ~blank[column] & reasons.isna()
+        reasons[bad] = [f"{column} 的值 {value!r} 无法解析" for value in text[column][bad]]
+        typed[column] = values.where(~blank[column])
+    invalid = reasons.notna()
+
+    frame = pd.DataFrame(typed, index=chunk.index)
+    # CSV行号：表头占第1行
+    line_numbers = chunk.index + 2
+    errors = [(int(line), reason) for line, reason in zip(line_numbers[invalid.to_numpy()], reasons[invalid])]
+    valid = frame[~invalid]
+    records = valid.astype(object).where(valid.notna(), None).to_dict('records')
+    return records, [int(line) for line in line_numbers[~invalid.to_numpy()]], errors
+
+
+def save_upload_records(path, records):
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(records))
+
+
+# 后台上传任务：状态保存在 upload_jobs 表，待写入的数据保存在 UPLOAD_JOB_DIR 下
+UPLOAD_JOB_TABLE = 'upload_jobs'
+UPLOAD_JOB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'upload_jobs')
+UPLOAD_JOB_WORKERS = 2
+# 任务中保存的错误明细条数
+UPLOAD_JOB_ERROR_LIMIT = 20
+UPLOAD_JOB_ACTIVE = ('queued', 'running')
+
+
+class UploadJobQueue:
+    """上传任务队列：每块数据与任务进度在同一事务中提交，重启后从最后提交的块继续"""
+
+    def __init__(self, workers):
+        self._workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """建表并恢复上次未完成的任务；只在第一次调用时执行"""
+        if self._executor is not None:
+            return
+        with self._lock:
+            if self._executor is not None:
+                return
+            os.makedirs(UPLOAD_JOB_DIR, exist_ok=True)
+            with db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS `{UPLOAD_JOB_TABLE}` (
+                        `id` CHAR(32) NOT NULL,
+                        `data_type` VARCHAR(32) NOT NULL,
+                        `source` VARCHAR(8) NOT NULL COMMENT 'json: 记录列表, csv: CSV文件',
+                        `filename` VARCHAR(255) NULL,
+                        `status` VARCHAR(16) NOT NULL COMMENT 'queued/running/succeeded/failed',
+                        `total_rows` INT NULL,
+                        `processed_rows` INT NOT NULL DEFAULT 0,
+                        `inserted` INT NOT NULL DEFAULT 0,
+                        `updated` INT NOT NULL DEFAULT 0,
+                        `skipped` INT NOT NULL DEFAULT 0,
+                        `error_count` INT NOT NULL DEFAULT 0,
+                        `errors` TEXT NULL COMMENT '前若干条错误 [[位置, 信息], ...]',
+                        `message` VARCHAR(1024) NULL,
+                        `created_at` DATETIME NOT NULL,
+                        `started_at` DATETIME NULL,
+                        `finished_at` DATETIME NULL,
+                        PRIMARY KEY (`id`),
+                        INDEX `idx_status` (`status`)
+                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='后台上传任务'
+                    """)
+                    cursor.execute(
+                        f"SELECT id FROM `{UPLOAD_JOB_TABLE}` WHERE status IN (%s, %s) ORDER BY created_at",
+                        UPLOAD_JOB_ACTIVE
+                    )
+                    pending = [row['id'] for row in cursor.fetchall()]
+            executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='upload-job')
+            for job_id in pending:
+                app.logger.info(f"Resuming upload job {job_id}")
+                executor.submit(self._run, job_id)
+            self._executor = executor
+
+    def submit(self, data_type, source, save, total_rows=None, filename=None):
+        """用 save(path) 保存待写入的数据，登记任务并入队，返回任务ID"""
+        self.start()
+        job_id = uuid.uuid4().hex
+        save(self._payload_path(job_id, source))
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO `{UPLOAD_JOB_TABLE}` (id, data_type, source, filename, status, total_rows, created_at) "
+                    f"VALUES (%s, %s, %s, %s, 'queued', %s, %s)",
+                    (job_id, data_type, source, filename, total_rows, datetime.datetime.now())
+                )
+            conn.commit()
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id):
+        """返回任务状态，不存在时返回None"""
+        self.start()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"SELECT * FROM `{UPLOAD_JOB_TABLE}` WHERE id = %s", (job_id,))
+                job = cursor.fetchone()
+        if job is None:
+            return None
+
+        elapsed = None
+        if job['started_at']:
+            elapsed = ((job['finished_at'] or datetime.datetime.now()) - job['started_at']).total_seconds()
+        errors = json.loads(job.pop('errors') or '[]')
+        label = "行" if job['source'] == 'csv' else "条数据"
+        job.update({
+            "done": job['status'] not in UPLOAD_JOB_ACTIVE,
+            "success_count": job['inserted'] + job['updated'] + job['skipped'],
+            "rows_per_second": round(job['processed_rows'] / elapsed, 1) if elapsed else None,
+            "errors": [f"第 {position} {label}: {message}" for position, message in errors[:5]]  # 只返回前5个错误
+        })
+        return job
+
+    @staticmethod
+    def _payload_path(job_id, source):
+        return os.path.join(UPLOAD_JOB_DIR, f"{job_id}.{source}")
+
+    @staticmethod
+    def _chunks(job):
+        """按块产出 (读到的总行数, 有效记录, 记录对应的位置, 无效行)，位置为CSV行号或记录序号（从1开始）"""
+        path = UploadJobQueue._payload_path(job['id'], job['source'])
+        if job['source'] == 'csv':
+            reader = pd.read_csv(path, dtype=str, encoding='utf-8-sig',
+                                 chunksize=UPLOAD_CHUNK_ROWS, skip_blank_lines=True)
+            total = 0
+            for chunk in reader:
+                total += len(chunk)
+                yield (total,) + coerce_upload_chunk(chunk, job['data_type'])
+        else:
+            with open(path, 'rb') as f:
+                records = orjson.loads(f.read())
+            for start in range(0, len(records), UPLOAD_CHUNK_ROWS):
+                chunk = records[start:start + UPLOAD_CHUNK_ROWS]
+                yield start + len(chunk), chunk, list(range(start + 1, start + len(chunk) + 1)), []
 
-def create_water_quality_table_if_not_exists(cursor, table_name):
-    """创建水质数据表（如果不存在）"""
+    def _run(self, job_id):
+        try:
+            with db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"SELECT * FROM `{UPLOAD_JOB_TABLE}` WHERE id = %s", (job_id,))
+                    job = cursor.fetchone()
+                    if job is None or job['status'] not in UPLOAD_JOB_ACTIVE:
+                        return
+                    cursor.execute(
+                        f"UPDATE `{UPLOAD_JOB_TABLE}` SET status = 'running', started_at = COALESCE(started_at, %s) "
+                        f"WHERE id = %s",
+                        (datetime.datetime.now(), job_id)
+                    )
+                    conn.commit()
+                    try:
+                        self._process(conn, cursor, job)
+                    except Exception as e:
+                        conn.rollback()
+                        app.logger.error(f"Upload job {job_id} failed: {str(e)}")
+                        cursor.execute(
+                            f"UPDATE `{UPLOAD_JOB_TABLE}` SET status = 'failed', message = %s, finished_at = %s "
+                            f"WHERE id = %s",
+                            (upload_job_error_message(e)[:1024], datetime.datetime.now(), job_id)
+                        )
+                        conn.commit()
+            path = self._payload_path(job_id, job['source'])
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception as e:
+            # 数据库不可用等情况：任务保持原状态，下次启动时继续
+            app.logger.error(f"Upload job {job_id} interrupted: {str(e)}")
+
+    def _process(self, conn, cursor, job):
+        counts = {name: job[name] for name in ('inserted', 'updated', 'skipped')}
+        errors = json.loads(job['errors'] or '[]')
+        error_count = job['error_count']
+        processed = job['processed_rows']
+        for total, records, positions, chunk_errors in self._chunks(job):
+            if total <= processed:
+                continue  # 重启前已提交的块
+            chunk_counts, failures, cache_updates = bulk_insert_records(cursor, job['data_type'], records)
+            chunk_errors = sorted(chunk_errors + [(positions[index], message) for index, message in failures])
+            for name, count in chunk_counts.items():
+                counts[name] += count
+            error_count += len(chunk_errors)
+            errors = (errors + chunk_errors)[:UPLOAD_JOB_ERROR_LIMIT]
+            processed = total
+            # 数据与进度在同一事务中提交
+            cursor.execute(
+                f"UPDATE `{UPLOAD_JOB_TABLE}` SET processed_rows = %s, inserted = %s, updated = %s, skipped = %s, "
+                f"error_count = %s, errors = %s WHERE id = %s",
+                (processed, counts['inserted'], counts['updated'], counts['skipped'],
+                 error_count, json.dumps(errors, ensure_ascii=False), job['id'])
+            )
+            conn.commit()
+            apply_cache_updates(job['data_type'], cache_updates)
+            app.logger.info(f"Upload job {job['id']}: {processed} rows processed, {counts}")
+
+        success_count = sum(counts.values())
+        cursor.execute(
+            f"UPDATE `{UPLOAD_JOB_TABLE}` SET status = %s, total_rows = %s, message = %s, finished_at = %s WHERE id = %s",
+            ('failed' if error_count and not success_count else 'succeeded', processed,
+             f"共 {processed} 条，成功 {success_count} 条（新增 {counts['inserted']}，更新 {counts['updated']}，"
+             f"未变化 {counts['skipped']}），失败 {error_count} 条",
+             datetime.datetime.now(), job['id'])
+        )
+        conn.commit()
+
+
+def upload_job_error_message(error):
+    if isinstance(error, pd.errors.EmptyDataError):
+        return "CSV文件为空"
+    if isinstance(error, (pd.errors.ParserError, UnicodeDecodeError)):
+        return f"CSV文件格式错误: {str(error)}"
+    return f"数据写入失败: {str(error)}"
+
+
+upload_jobs = UploadJobQueue(UPLOAD_JOB_WORKERS)
+
+
+@app.before_request
+def start_upload_jobs():
+    """服务启动后的第一个请求时恢复未完成的上传任务，数据库暂不可用时下次请求再试"""
     try:
-        cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
-        if cursor.fetchone():
-            return  # 表已存在
-        
-        # 创建表
+        upload_jobs.start()
+    except Exception as e:
+        app.logger.error(f"Failed to start upload job queue: {str(e)}")
+
+
+# 批量插入时每次 executemany 的行数
+BULK_INSERT_CHUNK = 1000
+# 水质月度表的 NOT NULL 字段
+WATER_QUALITY_REQUIRED_FIELDS = ['province', 'basin', 'section_name']
+# 上传去重键：水质月度表按 (断面, 监测时间) 唯一，鱼类按内容摘要唯一
+UPSERT_KEYS = {'water_quality': ('section_name', 'monitor_time'), 'fish_data': ('content_hash',)}
+
+
+def pick_insert_fields(data, allowed):
+    """与逐条插入时相同：空值字段不写入"""
+    fields = []
+    values = []
+    for field in allowed:
+        if field in data and not is_blank(data[field]):
+            fields.append(field)
+            values.append(data[field])
+    if not fields:
+        raise ValueError("没有可写入的字段")
+    return tuple(fields), values
+
+
+def prepare_water_quality_row(data):
+    """确定水质记录的目标月度表并提取字段，返回 (表名, 字段, 值)；数值无法解析时抛出 ValueError"""
+    monitor_time = data.get('monitor_time')
+    
+    if monitor_time:
+        # 从时间中提取年月
+        dt = datetime.datetime.fromisoformat(monitor_time.replace('Z', '+00:00'))
+        table_name = f"{dt.year}-{dt.month:02d}"
+    else:
+        # 如果没有时间，使用当前时间
+        now = datetime.datetime.now()
+        table_name = f"{now.year}-{now.month:02d}"
+    
+    missing = [field for field in WATER_QUALITY_REQUIRED_FIELDS if is_blank(data.get(field))]
+    if missing:
+        raise ValueError(f"缺少必填字段: {', '.join(missing)}")
+    fields, values = pick_insert_fields(data, WATER_QUALITY_FIELDS)
+    # 先计算汇总增量，数值无法解析时不插入
+    build_rollup_deltas(table_name, [data])
+    return table_name, fields, values
+
+
+def fish_content_hash(data):
+    """鱼类记录的内容摘要：品种和各测量值都相同视为同一条记录"""
+    _, values = FishStatistics.prepare(data)
+    parts = [str(data.get('species') or '').strip()] + [repr(values[m]) for m in FISH_MEASURES]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def prepare_fish_row(data):
+    """提取鱼类记录字段（附带内容摘要），返回 ('fishes', 字段, 值)；数值无法解析时抛出 ValueError"""
+    fields, values = pick_insert_fields(data, FISH_FIELDS)
+    # 计算摘要时同时校验数值，无法解析时不插入
+    return 'fishes', fields + ('content_hash',), values + [fish_content_hash(data)]
+
+
+_fish_hash_ready = False
+_fish_hash_lock = threading.Lock()
+
+def ensure_fish_content_hash():
+    """为 fishes 表补充内容摘要列和唯一键（已有数据摘要为NULL，不参与去重）；DDL使用独立连接"""
+    global _fish_hash_ready
+    if _fish_hash_ready:
+        return
+    with _fish_hash_lock:
+        if _fish_hash_ready:
+            return
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) AS n FROM information_schema.COLUMNS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'fishes' AND COLUMN_NAME = 'content_hash'"
+                )
+                if not cursor.fetchone()['n']:
+                    cursor.execute(
+                        "ALTER TABLE fishes ADD COLUMN `content_hash` CHAR(40) NULL COMMENT '内容摘要，用于上传去重', "
+                        "ADD UNIQUE KEY `uk_content_hash` (`content_hash`)"
+                    )
+        _fish_hash_ready = True
+
+
+def upsert_key(data_type, fields, values):
+    """记录的去重键：水质为 (断面, 监测时间)，没有监测时间时不去重；鱼类为内容摘要"""
+    if data_type == 'fish_data':
+        return values[fields.index('content_hash')]
+    if 'monitor_time' not in fields:
+        return None
+    moment = datetime.datetime.fromisoformat(str(values[fields.index('monitor_time')]).replace('Z', '+00:00'))
+    return values[fields.index('section_name')], moment.replace(tzinfo=None, microsecond=0)
+
+
+def find_existing_keys(cursor, data_type, table_name, keys):
+    """查询一批去重键中已存在于表中的部分"""
+    keys = [key for key in keys if key is not None]
+    if not keys:
+        return set()
+    if data_type == 'fish_data':
+        cursor.execute(
+            f"SELECT content_hash FROM fishes WHERE content_hash IN ({', '.join(['%s'] * len(keys))})", keys
+        )
+        return {row['content_hash'] for row in cursor.fetchall()}
+    cursor.execute(
+        f"SELECT section_name, monitor_time FROM `{table_name}` "
+        f"WHERE (section_name, monitor_time) IN ({', '.join(['(%s, %s)'] * len(keys))})",
+        [value for key in keys for value in key]
+    )
+    return {(row['section_name'], row['monitor_time']) for row in cursor.fetchall()}
+
+
+def upsert_assignments(fields, key_fields):
+    """ON DUPLICATE KEY UPDATE 子句：用新值覆盖非键字段"""
+    updates = [f"`{f}` = VALUES(`{f}`)" for f in fields if f not in key_fields]
+    return ", ".join(updates) or f"`{fields[0]}` = `{fields[0]}`"
+
+
+def bulk_insert_records(cursor, data_type, records):
+    """按 (目标表, 字段集合) 分组，按去重键批量 INSERT ... ON DUPLICATE KEY UPDATE
+
+    同一批内去重键重复的记录只保留最后一条。某一块写入失败时回滚到保存点并逐条重试，以便定位出错的行。
+    返回 ({"inserted": 新增, "updated": 更新, "skipped": 内容未变或被同批覆盖}, [(记录序号, 错误信息), ...],
+    进程内缓存的更新)；缓存更新需在事务提交后交给 apply_cache_updates。
+    """
+    prepare = prepare_water_quality_row if data_type == 'water_quality' else prepare_fish_row
+    if data_type == 'fish_data':
+        ensure_fish_content_hash()
+    key_fields = UPSERT_KEYS[data_type]
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    groups = {}
+    errors = []
+    for index, item in enumerate(records):
+        try:
+            table_name, fields, values = prepare(item)
+            key = upsert_key(data_type, fields, values)
+        except Exception as e:
+            errors.append((index, str(e)))
+            continue
+        group = groups.setdefault((table_name, fields), {})
+        if key is not None and key in group:
+            counts["skipped"] += 1
+        group[key if key is not None else ('row', index)] = (index, item, values, key)
+
+    # 建表、补唯一键等DDL在写入之前按目标表各做一次：DDL使用独立连接，
+    # 若本事务已写过该表会互相等待元数据锁
+    deduplicated = {}
+    if data_type == 'water_quality':
+        for table_name in {table_name for table_name, _ in groups}:
+            create_water_quality_table_if_not_exists(table_name)
+            # 旧表存在重复记录、无法加唯一键时退化为直接插入
+            deduplicated[table_name] = ensure_upsert_key(table_name)
+
+    # 有记录被更新的月份最后重建汇总，增量无法扣除旧值
+    dirty_tables = set()
+    cache_updates = []
+    for (table_name, fields), group in groups.items():
+        rows = list(group.values())
+
+        existing = set()
+        if deduplicated.get(table_name, True):
+            for start in range(0, len(rows), BULK_INSERT_CHUNK):
+                existing |= find_existing_keys(
+                    cursor, data_type, table_name, [key for _, _, _, key in rows[start:start + BULK_INSERT_CHUNK]]
+                )
+
+        # 大批量时优先用 LOAD DATA LOCAL INFILE 导入
+        if len(rows) >= LOAD_DATA_MIN_ROWS:
+            affected = load_data_rows(cursor, table_name, fields, rows, key_fields)
+            if affected is not None:
+                record_upserted(cursor, data_type, table_name, rows, existing, affected, counts, dirty_tables, cache_updates)
+                continue
+
+        query = (
+            f"INSERT INTO `{table_name}` ({', '.join(f'`{f}`' for f in fields)}) "
+            f"VALUES ({', '.join(['%s'] * len(fields))}) "
+            f"ON DUPLICATE KEY UPDATE {upsert_assignments(fields, key_fields)}"
+        )
+        for start in range(0, len(rows), BULK_INSERT_CHUNK):
+            chunk = rows[start:start + BULK_INSERT_CHUNK]
+            cursor.execute("SAVEPOINT bulk_chunk")
+            try:
+                affected = cursor.executemany(query, [values for _, _, values, _ in chunk])
+                written = chunk
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT bulk_chunk")
+                written = []
+                affected = 0
+                for row in chunk:
+                    try:
+                        affected += cursor.execute(query, row[2])
+                        written.append(row)
+                    except Exception as e:
+                        errors.append((row[0], str(e)))
+            cursor.execute("RELEASE SAVEPOINT bulk_chunk")
+            record_upserted(cursor, data_type, table_name, written, existing, affected, counts, dirty_tables, cache_updates)
+
+    for table_name in dirty_tables:
+        rebuild_water_quality_rollup(cursor, table_name)
+
+    errors.sort()
+    return counts, errors, cache_updates
+
+
+def record_upserted(cursor, data_type, table_name, rows, existing, affected, counts, dirty_tables, cache_updates):
+    """根据影响行数统计新增/更新/跳过条数（新增计1、更新计2、未变化计0），更新汇总表并收集进程内缓存的更新"""
+    if not rows:
+        return
+    new_items = [item for _, item, _, key in rows if key is None or key not in existing]
+    updated = max((affected - len(new_items)) // 2, 0)
+    counts["inserted"] += len(new_items)
+    counts["updated"] += updated
+    counts["skipped"] += max(len(rows) - len(new_items) - updated, 0)
+
+    if data_type == 'water_quality':
+        if table_name in dirty_tables:
+            pass  # 最后会全量重建
+        elif updated or (new_items and not period_has_rollup(cursor, table_name)):
+            # 该月份还没有汇总数据时增量只会统计新行，同样改为最后全量重建
+            dirty_tables.add(table_name)
+        elif new_items:
+            apply_rollup_deltas(cursor, build_rollup_deltas(table_name, new_items))
+        cache_updates.extend(
+            (table_name, item.get('province'), item.get('basin'), item.get('section_name')) for _, item, _, _ in rows
+        )
+    else:
+        cache_updates.extend(FishStatistics.prepare(item) for item in new_items)
+
+
+def apply_cache_updates(data_type, cache_updates):
+    """事务提交后再更新层级索引或鱼类统计；事务回滚时丢弃即可，内存中不会多算未入库的行"""
+    for update in cache_updates:
+        if data_type == 'water_quality':
+            section_hierarchy.add(*update)
+        else:
+            fish_statistics_store.apply(update)
+
+
+# LOAD DATA 快速导入：达到该行数的分组才使用；空值标记与 scripts/import_data.py 一致
+LOAD_DATA_MIN_ROWS = 1000
+LOAD_DATA_NULL = '--'
+# 客户端或服务端禁用 local_infile 时的错误码
+LOCAL_INFILE_DISABLED_ERRORS = {1148, 2068, 3948}
+_local_infile_enabled = True
+
+
+def load_data_rows(cursor, table_name, fields, rows, key_fields):
+    """把已校验的行写入临时CSV，LOAD DATA LOCAL INFILE 到临时表后 INSERT ... SELECT 合并到目标表
+
+    返回合并的影响行数；local_infile 被禁用、导入失败、导入行数不符或有值被截断时回滚并返回None，
+    由调用方改用批量INSERT（逐行报告出错的记录）。
+    """
+    global _local_infile_enabled
+    if not _local_infile_enabled:
+        return None
+
+    staged = tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', newline='', delete=False)
+    staging_table = f"_staging_{table_name.replace('-', '_')}"
+    columns = ', '.join(f'`{f}`' for f in fields)
+    try:
+        with staged:
+            writer = csv.writer(staged, lineterminator='\n')
+            writer.writerows(values for _, _, values, _ in rows)
+
+        path = staged.name.replace("\\", "/")
+        variables = [f"@v{i}" for i in range(len(fields))]
+        query = (
+            f"LOAD DATA LOCAL INFILE '{path}' "
+            f"INTO TABLE `{staging_table}` "
+            f"CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            f"LINES TERMINATED BY '\\n' "
+            f"({', '.join(variables)}) "
+            f"SET {', '.join(f'`{field}` = NULLIF({var}, %s)' for field, var in zip(fields, variables))}"
+        )
+
+        cursor.execute("SAVEPOINT load_data")
+        try:
+            # 临时表的 DDL 不会隐式提交事务；没有建临时表权限时同样改用批量INSERT
+            cursor.execute(f"CREATE TEMPORARY TABLE `{staging_table}` LIKE `{table_name}`")
+            loaded = cursor.execute(query, [LOAD_DATA_NULL] * len(fields))
+            # LOAD DATA LOCAL 遇到无法转换的值只产生警告（写成0或NULL），INSERT 则会报错
+            cursor.execute("SHOW WARNINGS")
+            warnings = [row for row in cursor.fetchall() if row['Level'] != 'Note']
+            if loaded != len(rows) or warnings:
+                # 有行被跳过或值被截断，改用逐块写入以报告具体出错的行
+                if warnings:
+                    app.logger.warning(f"LOAD DATA into {table_name} raised {len(warnings)} warnings: {warnings[0]['Message']}")
+                cursor.execute("ROLLBACK TO SAVEPOINT load_data")
+                return None
+            affected = cursor.execute(
+                f"INSERT INTO `{table_name}` ({columns}) SELECT {columns} FROM `{staging_table}` "
+                f"ON DUPLICATE KEY UPDATE {upsert_assignments(fields, key_fields)}"
+            )
+        except pymysql.err.MySQLError as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT load_data")
+            if e.args and e.args[0] in LOCAL_INFILE_DISABLED_ERRORS:
+                _local_infile_enabled = False
+                app.logger.warning("LOAD DATA LOCAL INFILE is disabled, falling back to batched INSERT")
+            else:
+                app.logger.warning(f"LOAD DATA into {table_name} failed, falling back to batched INSERT: {str(e)}")
+            return None
+        cursor.execute("RELEASE SAVEPOINT load_data")
+        return affected
+    finally:
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS `{staging_table}`")
+        os.remove(staged.name)
+
+
+# 同一进程内串行建表，避免多个请求同时为同一新月份建表
+_table_create_lock = threading.Lock()
+
+def create_water_quality_table_if_not_exists(table_name):
+    """创建水质数据表（如果不存在）；已存在的表只查内存中的月度表目录。
+    CREATE TABLE 会隐式提交事务，因此使用独立连接，不影响调用方未提交的写入"""
+    if period_catalog.contains(table_name):
+        return  # 表已存在
+    
+    with _table_create_lock:
+        if period_catalog.contains(table_name):
+            return  # 其他请求已建好
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                _create_water_quality_table(cursor, table_name)
+
+def _create_water_quality_table(cursor, table_name):
+    try:
+        # 创建表（同时建立索引），IF NOT EXISTS 防止与其他进程（如导入脚本）冲突
+        index_definitions = ",\n            ".join(
+            f"INDEX `{name}` ({', '.join(f'`{col}`' for col in columns)})"
+            for name, columns in WATER_QUALITY_INDEXES.items()
+        )
+        unique_name, unique_columns = WATER_QUALITY_UNIQUE_KEY
         create_query = f"""
-        CREATE TABLE `{table_name}` (
+        CREATE TABLE IF NOT EXISTS `{table_name}` (
             `province` VARCHAR(255) NOT NULL COMMENT '省份',
             `basin` VARCHAR(255) NOT NULL COMMENT '流域',
             `section_name` VARCHAR(255) NOT NULL COMMENT '断面名称',
@@ -2687,14 +4158,226 @@ def create_water_quality_table_if_not_exists(cursor, table_name):
             `total_nitrogen` FLOAT NULL COMMENT '总氮',
             `chlorophyll_a` FLOAT NULL COMMENT '叶绿素α',
             `algae_density` FLOAT NULL COMMENT '藻密度',
-            `station_status` VARCHAR(255) NULL COMMENT '站点情况'
+            `station_status` VARCHAR(255) NULL COMMENT '站点情况',
+            {index_definitions},
+            UNIQUE KEY `{unique_name}` ({', '.join(f'`{col}`' for col in unique_columns)})
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='{table_name}水质监测数据'
         """
         cursor.execute(create_query)
+        period_catalog.add(table_name)
+        _upsert_key_tables.add(table_name)
         
     except Exception as e:
         pass
 
+def ensure_water_quality_indexes(cursor, table_name):
+    """为已有的水质月度表补建缺失的索引，返回新建的索引名列表"""
+    cursor.execute(
+        "SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table_name,)
+    )
+    existing = {row['INDEX_NAME'] for row in cursor.fetchall()}
+    missing = [name for name in WATER_QUALITY_INDEXES if name not in existing]
+    if missing:
+        cursor.execute(f"ALTER TABLE `{table_name}` " + ", ".join(
+            f"ADD INDEX `{name}` ({', '.join(f'`{col}`' for col in WATER_QUALITY_INDEXES[name])})"
+            for name in missing
+        ))
+    unique_name, unique_columns = WATER_QUALITY_UNIQUE_KEY
+    if unique_name not in existing:
+        try:
+            cursor.execute(
+                f"ALTER TABLE `{table_name}` ADD UNIQUE KEY `{unique_name}` "
+                f"({', '.join(f'`{col}`' for col in unique_columns)})"
+            )
+            missing.append(unique_name)
+        except pymysql.err.IntegrityError as e:
+            # 已有重复的 (断面, 监测时间) 记录，需先人工清理
+            app.logger.warning(f"Cannot add {unique_name} to {table_name}, duplicate rows exist: {str(e)}")
+    return missing
+
+
+# 已确认带有去重唯一键的水质月度表，以及因已有重复记录无法加唯一键的表（清理后需重启服务）
+_upsert_key_tables = set()
+_upsert_key_unavailable = set()
+_upsert_key_lock = threading.Lock()
+
+def ensure_upsert_key(table_name):
+    """确保水质月度表带有 (断面, 监测时间) 唯一键，返回是否可按该键去重；DDL使用独立连接"""
+    if table_name in _upsert_key_tables:
+        return True
+    if table_name in _upsert_key_unavailable:
+        return False
+    with _upsert_key_lock:
+        if table_name in _upsert_key_tables:
+            return True
+        if table_name in _upsert_key_unavailable:
+            return False
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                ensure_water_quality_indexes(cursor, table_name)
+                cursor.execute(
+                    "SELECT COUNT(*) AS n FROM information_schema.STATISTICS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+                    (table_name, WATER_QUALITY_UNIQUE_KEY[0])
+                )
+                if not cursor.fetchone()['n']:
+                    _upsert_key_unavailable.add(table_name)
+                    return False
+        _upsert_key_tables.add(table_name)
+        return True
+
+@app.cli.command('create-indexes')
+def create_indexes_command():
+    """一次性为所有已有水质月度表补建索引: flask --app app create-indexes"""
+    with db_connection() as conn:
+        with conn.cursor() as cursor:
+            for table_name in period_catalog.tables():
+                created = ensure_water_quality_indexes(cursor, table_name)
+                if created:
+                    print(f"{table_name}: 已创建索引 {', '.join(created)}")
+                else:
+                    print(f"{table_name}: 索引已存在")
+
+
+
+# 水质统计汇总表：按 (月份, 省份, 流域, 水质类别) 维护记录数、各指标求和与空值数
+ROLLUP_TABLE = 'water_quality_rollup'
+
+# 汇总的水质指标 -> /api/water-quality/statistics 中的平均值字段名
+ROLLUP_INDICATORS = {
+    'water_temperature': 'avg_temperature',
+    'pH': 'avg_ph',
+    'dissolved_oxygen': 'avg_oxygen',
+    'conductivity': 'avg_conductivity',
+    'turbidity': 'avg_turbidity',
+    'permanganate_index': 'avg_permanganate',
+    'ammonia_nitrogen': 'avg_ammonia',
+    'total_phosphorus': 'avg_phosphorus',
+    'total_nitrogen': 'avg_nitrogen',
+    'chlorophyll_a': 'avg_chlorophyll',
+    'algae_density': 'avg_algae'
+}
+
+_rollup_table_ready = False
+_rollup_table_lock = threading.Lock()
+
+def ensure_rollup_table():
+    """创建汇总表（如果不存在）；DDL会隐式提交事务，因此使用独立连接"""
+    global _rollup_table_ready
+    if _rollup_table_ready:
+        return
+    with _rollup_table_lock:
+        if _rollup_table_ready:
+            return
+        indicator_columns = ",\n            ".join(
+            f"`sum_{ind}` DOUBLE NOT NULL DEFAULT 0, `null_{ind}` INT NOT NULL DEFAULT 0"
+            for ind in ROLLUP_INDICATORS
+        )
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS `{ROLLUP_TABLE}` (
+                    `period` CHAR(7) NOT NULL COMMENT '月度表名',
+                    `province` VARCHAR(255) NOT NULL COMMENT '省份',
+                    `basin` VARCHAR(255) NOT NULL COMMENT '流域',
+                    `category` VARCHAR(64) NOT NULL DEFAULT '' COMMENT '水质类别，空串表示未填写',
+                    `row_count` INT NOT NULL DEFAULT 0,
+                    {indicator_columns},
+                    PRIMARY KEY (`period`, `province`, `basin`, `category`)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='水质月度统计汇总'
+                """)
+        _rollup_table_ready = True
+
+def build_rollup_deltas(table_name, records):
+    """把待插入的记录按汇总键累加成增量，数值无法解析时抛出 ValueError"""
+    deltas = {}
+    for data in records:
+        category = data.get('water_quality_category')
+        key = (table_name, data.get('province'), data.get('basin'),
+               str(category).strip() if category and str(category).strip() else '')
+        delta = deltas.setdefault(key, [0] + [0.0] * len(ROLLUP_INDICATORS) + [0] * len(ROLLUP_INDICATORS))
+        delta[0] += 1
+        for i, ind in enumerate(ROLLUP_INDICATORS):
+            value = data.get(ind)
+            # 与 pick_insert_fields 一致：空值不写入，按 NULL 统计
+            if not is_blank(value):
+                delta[1 + i] += float(value)
+            else:
+                delta[1 + len(ROLLUP_INDICATORS) + i] += 1
+    return deltas
+
+def apply_rollup_deltas(cursor, deltas):
+    """将增量累加到汇总表，需与数据插入在同一事务中执行"""
+    if not deltas:
+        return
+    ensure_rollup_table()
+    sum_columns = [f"sum_{ind}" for ind in ROLLUP_INDICATORS]
+    null_columns = [f"null_{ind}" for ind in ROLLUP_INDICATORS]
+    columns = ['period', 'province', 'basin', 'category', 'row_count'] + sum_columns + null_columns
+    updates = ", ".join(f"`{col}` = `{col}` + VALUES(`{col}`)" for col in ['row_count'] + sum_columns + null_columns)
+    query = (
+        f"INSERT INTO `{ROLLUP_TABLE}` ({', '.join(f'`{col}`' for col in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON DUPLICATE KEY UPDATE {updates}"
+    )
+    cursor.executemany(query, [list(key) + delta for key, delta in deltas.items()])
+
+def rebuild_water_quality_rollup(cursor, table_name):
+    """根据月度表全量重建该月份的汇总数据（批量导入后使用）"""
+    ensure_rollup_table()
+    sum_columns = ", ".join(f"`sum_{ind}`" for ind in ROLLUP_INDICATORS)
+    null_columns = ", ".join(f"`null_{ind}`" for ind in ROLLUP_INDICATORS)
+    sum_exprs = ", ".join(f"COALESCE(SUM(`{ind}`), 0)" for ind in ROLLUP_INDICATORS)
+    null_exprs = ", ".join(f"SUM(`{ind}` IS NULL)" for ind in ROLLUP_INDICATORS)
+    cursor.execute(f"DELETE FROM `{ROLLUP_TABLE}` WHERE period = %s", (table_name,))
+    cursor.execute(f"""
+        INSERT INTO `{ROLLUP_TABLE}` (period, province, basin, category, row_count, {sum_columns}, {null_columns})
+        SELECT %s, province, basin, COALESCE(water_quality_category, ''), COUNT(*), {sum_exprs}, {null_exprs}
+        FROM `{table_name}`
+        GROUP BY province, basin, COALESCE(water_quality_category, '')
+    """, (table_name,))
+
+def period_has_rollup(cursor, table_name):
+    ensure_rollup_table()
+    cursor.execute(f"SELECT 1 FROM `{ROLLUP_TABLE}` WHERE period = %s LIMIT 1", (table_name,))
+    return cursor.fetchone() is not None
+
+# 等待其他请求重建同一月份汇总数据的最长时间(秒)
+ROLLUP_LOCK_TIMEOUT = 30
+
+def ensure_period_rollup(conn, cursor, table_name):
+    """该月份还没有汇总数据时先全量重建并提交，返回是否进行了重建
+
+    仪表盘会同时请求同一月份的多个统计接口，用 GET_LOCK 按月份串行重建，拿到锁后再检查一次。
+    """
+    if period_has_rollup(cursor, table_name):
+        return False
+    lock_name = f"{ROLLUP_TABLE}:{table_name}"
+    cursor.execute("SELECT GET_LOCK(%s, %s) AS acquired", (lock_name, ROLLUP_LOCK_TIMEOUT))
+    if not cursor.fetchone()['acquired']:
+        raise TimeoutError(f"等待 {table_name} 汇总数据重建超时")
+    try:
+        # 结束当前事务的一致性读快照，才能看到其他请求已提交的重建结果
+        conn.commit()
+        if period_has_rollup(cursor, table_name):
+            return False
+        rebuild_water_quality_rollup(cursor, table_name)
+        conn.commit()
+        return True
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (lock_name,))
+
+@app.cli.command('rebuild-rollup')
+def rebuild_rollup_command():
+    """全量重建所有月份的统计汇总: flask --app app rebuild-rollup"""
+    with db_connection() as conn:
+        with conn.cursor() as cursor:
+            for table_name in period_catalog.tables():
+                rebuild_water_quality_rollup(cursor, table_name)
+                conn.commit()
+                print(f"{table_name}: 汇总数据已重建")
 
 
 @app.route('/api/recent-data', methods=['GET'])
@@ -2707,21 +4390,19 @@ def get_recent_data():
         if not data_type:
             return jsonify({"success": False, "error": "缺少数据类型参数"}), 400
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        recent_data = []
+        with db_connection() as conn:
+            cursor = conn.cursor()
         
-        if data_type == 'water_quality':
-            # 获取最近的水质数据
-            recent_data = get_recent_water_quality_data(cursor, limit)
-        elif data_type == 'fish_data':
-            # 获取最近的鱼类数据
-            recent_data = get_recent_fish_data(cursor, limit)
-        else:
-            return jsonify({"success": False, "error": "不支持的数据类型"}), 400
+            recent_data = []
         
-        conn.close()
+            if data_type == 'water_quality':
+                # 获取最近的水质数据
+                recent_data = get_recent_water_quality_data(cursor, limit)
+            elif data_type == 'fish_data':
+                # 获取最近的鱼类数据
+                recent_data = get_recent_fish_data(cursor, limit)
+            else:
+                return jsonify({"success": False, "error": "不支持的数据类型"}), 400
         
         return jsonify({
             "success": True,
@@ -2735,42 +4416,37 @@ def get_recent_data():
 def get_recent_water_quality_data(cursor, limit):
     """获取最近的水质数据"""
     try:
-        # 获取所有水质数据表
-        cursor.execute("SHOW TABLES LIKE '%-%'")
-        tables = cursor.fetchall()
+        # 从月度表目录获取所有水质数据表 (YYYY-MM)
+        tables = period_catalog.tables()
         
         all_data = []
         
-        for table_info in tables:
-            table_name = list(table_info.values())[0]
-            
-            # 验证表名格式 (YYYY-MM)
-            if len(table_name) == 7 and table_name[4] == '-':
-                try:
-                    # 获取该表的最新数据
-                    query = f"""
-                    SELECT *, '{table_name}' as source_table 
-                    FROM `{table_name}` 
-                    ORDER BY monitor_time DESC, province, basin, section_name 
-                    LIMIT {limit}
-                    """
-                    cursor.execute(query)
-                    table_data = cursor.fetchall()
-                    
-                    # 为每条数据添加估算的上传时间
-                    for row in table_data:
-                        # 如果有monitor_time就用它，否则用表名估算
-                        if row.get('monitor_time'):
-                            row['upload_time'] = row['monitor_time']
-                        else:
-                            # 用表名生成一个估算时间
-                            year, month = table_name.split('-')
-                            row['upload_time'] = f"{year}-{month}-01T00:00:00"
-                    
-                    all_data.extend(table_data)
-                    
-                except Exception as e:
-                    continue
+        for table_name in tables:
+            try:
+                # 获取该表的最新数据
+                query = f"""
+                SELECT *, '{table_name}' as source_table 
+                FROM `{table_name}` 
+                ORDER BY monitor_time DESC, province, basin, section_name 
+                LIMIT {limit}
+                """
+                cursor.execute(query)
+                table_data = cursor.fetchall()
+                
+                # 为每条数据添加估算的上传时间
+                for row in table_data:
+                    # 如果有monitor_time就用它，否则用表名估算
+                    if row.get('monitor_time'):
+                        row['upload_time'] = row['monitor_time']
+                    else:
+                        # 用表名生成一个估算时间
+                        year, month = table_name.split('-')
+                        row['upload_time'] = f"{year}-{month}-01T00:00:00"
+                
+                all_data.extend(table_data)
+                
+            except Exception as e:
+                continue
         
         # 按时间排序并限制数量
         all_data.sort(key=lambda x: x.get('upload_time', ''), reverse=True)
@@ -2797,7 +4473,7 @@ def get_recent_fish_data(cursor, limit):
         
         # 根据是否有id字段选择不同的查询策略
         if has_id_field:
-            query = f"SELECT * FROM fishes ORDER BY id DESC LIMIT {limit}"
+            query = f"SELECT {select_columns(FISH_COLUMNS)} FROM fishes ORDER BY id DESC LIMIT {limit}"
             cursor.execute(query)
             fish_data = cursor.fetchall()
         else:
@@ -2807,11 +4483,11 @@ def get_recent_fish_data(cursor, limit):
             
             if total_count <= limit:
                 # 如果总数据量小于等于限制数量，直接获取所有数据
-                query = "SELECT * FROM fishes"
+                query = f"SELECT {select_columns(FISH_FIELDS)} FROM fishes"
             else:
                 # 获取最后几条数据：跳过前面的数据，获取末尾的数据
                 offset = total_count - limit
-                query = f"SELECT * FROM fishes LIMIT {limit} OFFSET {offset}"
+                query = f"SELECT {select_columns(FISH_FIELDS)} FROM fishes LIMIT {limit} OFFSET {offset}"
             
             cursor.execute(query)
             fish_data = cursor.fetchall()
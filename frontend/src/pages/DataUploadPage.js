@@ -312,7 +312,7 @@ function DataUploadPage() {
           setTimeout(() => fetchRecentData(), 1000);
         }
       } else {
-        showNotification('上传失败：' + response.error, 'error');
+        showNotification('上传失败：' + (response.error || `${response.message}；${(response.errors || []).join('；')}`), 'error');
       }
     } catch (error) {
       showNotification('上传失败：' + error.message, 'error');
@@ -361,13 +361,17 @@ function DataUploadPage() {
     setUploadProgress({ uploaded: 0, total: csvData.length });
 
     try {
-      const response = await apiService.uploadCsvData(dataType, csvData, (progress) => {
-        setUploadProgress(progress);
+      // 直接上传文件，由服务端后台任务分块解析；上传阶段按已上传字节比例估算行数
+      const response = await apiService.uploadCsvFile(dataType, csvFile, (ratio) => {
+        setUploadProgress({ uploaded: Math.round(csvData.length * ratio), total: csvData.length });
+      }, (job) => {
+        // 文件上传完成后显示后台任务已写入的行数
+        setUploadProgress({ uploaded: job.processed_rows, total: csvData.length });
       });
       
       if (response.success) {
         showNotification(
-          `✅ 批量上传成功！共上传 ${csvData.length} 条${dataType === DATA_TYPES.WATER_QUALITY ? '水质' : '鱼类'}数据。点击"最近上传的数据"标签查看。`, 
+          `✅ 批量上传成功！共上传 ${response.success_count} 条${dataType === DATA_TYPES.WATER_QUALITY ? '水质' : '鱼类'}数据。点击"最近上传的数据"标签查看。`, 
           'success'
         );
         
@@ -376,7 +380,7 @@ function DataUploadPage() {
           localStorage.setItem('dataUploadSuccess', JSON.stringify({
             timestamp: Date.now(),
             dataType: 'water_quality',
-            count: csvData.length
+            count: response.success_count
           }));
         }
         
@@ -388,7 +392,7 @@ function DataUploadPage() {
           setTimeout(() => fetchRecentData(), 1000);
         }
       } else {
-        showNotification('上传失败：' + response.error, 'error');
+        showNotification('上传失败：' + (response.error || `${response.message}；${(response.errors || []).join('；')}`), 'error');
       }
     } catch (error) {
       showNotification('上传失败：' + error.message, 'error');
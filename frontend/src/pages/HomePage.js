@@ -135,6 +135,11 @@ const StatusChip = styled(Chip)(({ status }) => ({
   }),
 }));
 
+// 完整水质数据表每页行数
+const FULL_DATA_PAGE_SIZE = 200;
+// 跨时间段异常检测的查询超时（毫秒），多个月份的数据量可能超出默认的10秒
+const RANGE_CHECK_TIMEOUT = 60000;
+
 // 模拟历史水质数据（折线图 + 表格）
 const mockWaterQualityData = [
   { date: '2025-05-01', ph: 7.1, turbidity: 3.5, oxygen: 8.2 },
@@ -402,6 +407,9 @@ function HomePage() {
   const [newSelectedProvinceBasin, setNewSelectedProvinceBasin] = useState('');
 
   const [newFullWaterQualityData, setNewFullWaterQualityData] = useState([]);
+  // 完整数据表分页游标，为null表示没有更多数据
+  const [fullDataCursor, setFullDataCursor] = useState(null);
+  const [isLoadingMoreFullData, setIsLoadingMoreFullData] = useState(false);
 
   // 导出相关状态
   const [isExporting, setIsExporting] = useState(false);
@@ -858,47 +866,31 @@ function HomePage() {
     fetchNewProvinceBasinList();
   }, [newSelectedDate]);
 
+  // 省流域或日期变化时，水质数据和水质等级分布通过一次批量请求获取
   useEffect(() => {
-    const fetchWaterQualityData = async () => {
+    const fetchSelectionData = async () => {
       if (!selectedProvinceBasin || !selectedDate) return;
 
       const [province, basin] = selectedProvinceBasin.split('|');
       const [year, month] = selectedDate.split('-');
+      const params = { year, month, province, basin };
 
       try {
-        const res = await fetch(
-          `http://localhost:5000/api/water-quality/current_data?year=${year}&month=${month}&province=${province}&basin=${basin}`
-        );
-        const data = await res.json();
+        const batch = await apiService.batchQuery([
+          { id: 'currentData', path: '/api/water-quality/current_data', params },
+          { id: 'categoryStatistics', path: '/api/water-quality/category-statistics', params }
+        ]);
+        const bodies = Object.fromEntries((batch.results || []).map(({ id, body }) => [id, body || {}]));
 
+        const data = bodies.currentData || {};
         if (data.success && Array.isArray(data.data)) {
           setWaterQualityData(data.data);
         } else {
           console.warn('请求成功但数据格式不正确');
           setWaterQualityData([]);
         }
-      } catch (error) {
-        console.error('获取水质数据失败', error);
-        setWaterQualityData([]);
-      }
-    };
-
-    fetchWaterQualityData();
-  }, [selectedProvinceBasin, selectedDate]);
-
-  useEffect(() => {
-    const fetchCategoryDistribution = async () => {
-      if (!selectedProvinceBasin || !selectedDate) return;
-
-      const [province, basin] = selectedProvinceBasin.split('|');
-      const [year, month] = selectedDate.split('-');
-
-      try {
-        const res = await fetch(
-          `http://localhost:5000/api/water-quality/category-statistics?year=${year}&month=${month}&province=${province}&basin=${basin}`
-        );
-        const result = await res.json();
 
+        const result = bodies.categoryStatistics || {};
         if (result.success && result.data) {
           const transformed = Object.entries(result.data)
             .map(([category, count]) => ({ category, value: count }));
@@ -908,41 +900,68 @@ function HomePage() {
           setDistributionData([]);
         }
       } catch (error) {
-        console.error('获取水质等级分布失败', error);
+        console.error('获取水质数据和水质等级分布失败', error);
+        setWaterQualityData([]);
         setDistributionData([]);
       }
     };
 
-    fetchCategoryDistribution();
+    fetchSelectionData();
   }, [selectedProvinceBasin, selectedDate]);
 
+  // 按页获取完整水质数据，cursor为空时获取第一页
+  const fetchFullWaterQualityPage = useCallback(async (cursor) => {
+    const [province, basin] = newSelectedProvinceBasin.split('|');
+    const [year, month] = newSelectedDate.split('-');
+    const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+
+    const res = await fetch(
+      `http://localhost:5000/api/water-quality/full_data?year=${year}&month=${month}&province=${province}&basin=${basin}&limit=${FULL_DATA_PAGE_SIZE}${cursorParam}`
+    );
+    return res.json();
+  }, [newSelectedProvinceBasin, newSelectedDate]);
+
   useEffect(() => {
     const fetchNewFullWaterQualityData = async () => {
       if (!newSelectedProvinceBasin || !newSelectedDate) return;
 
-      const [province, basin] = newSelectedProvinceBasin.split('|');
-      const [year, month] = newSelectedDate.split('-');
-
       try {
-        const res = await fetch(
-          `http://localhost:5000/api/water-quality/full_data?year=${year}&month=${month}&province=${province}&basin=${basin}`
-        );
-        const data = await res.json();
+        const data = await fetchFullWaterQualityPage(null);
 
         if (data.success && Array.isArray(data.data)) {
           setNewFullWaterQualityData(data.data);
+          setFullDataCursor(data.next_cursor || null);
         } else {
           console.warn('请求成功但数据格式不正确');
           setNewFullWaterQualityData([]);
+          setFullDataCursor(null);
         }
       } catch (error) {
         console.error('获取完整水质数据失败', error);
         setNewFullWaterQualityData([]);
+        setFullDataCursor(null);
       }
     };
 
     fetchNewFullWaterQualityData();
-  }, [newSelectedProvinceBasin, newSelectedDate]);
+  }, [newSelectedProvinceBasin, newSelectedDate, fetchFullWaterQualityPage]);
+
+  // 加载下一页并追加到表格
+  const handleLoadMoreFullData = async () => {
+    if (!fullDataCursor || isLoadingMoreFullData) return;
+    setIsLoadingMoreFullData(true);
+    try {
+      const data = await fetchFullWaterQualityPage(fullDataCursor);
+      if (data.success && Array.isArray(data.data)) {
+        setNewFullWaterQualityData(prev => [...prev, ...data.data]);
+        setFullDataCursor(data.next_cursor || null);
+      }
+    } catch (error) {
+      console.error('加载更多水质数据失败', error);
+    } finally {
+      setIsLoadingMoreFullData(false);
+    }
+  };
 
   // 导出处理函数
   const handleExportWaterQuality = async (format) => {
@@ -1021,13 +1040,25 @@ function HomePage() {
       
       let totalAnomalies = 0;
       
-      for (const { period, year, month } of recentPeriods) {
+      // 一次请求获取全部时间段数据，再按时间段分组；只取检测需要的字段，查询失败时按检测失败处理
+      const rangeResult = await apiService.getWaterQualityRange(
+        recentPeriods[0].period,
+        recentPeriods[recentPeriods.length - 1].period,
+        { fields: ['section_name', 'monitor_time', ...Object.keys(WATER_QUALITY_STANDARDS)].join(',') },
+        { timeout: RANGE_CHECK_TIMEOUT }
+      );
+      if (!rangeResult || !rangeResult.success || !Array.isArray(rangeResult.data)) {
+        throw new Error(rangeResult?.error || '获取跨时间段数据失败');
+      }
+      
+      const rowsByPeriod = {};
+      rangeResult.data.forEach(item => {
+        (rowsByPeriod[item.period] = rowsByPeriod[item.period] || []).push(item);
+      });
+      
+      for (const { period } of recentPeriods) {
         try {
-          // 获取该时间段的数据
-          const response = await fetch(
-            `http://localhost:5000/api/water-quality/full_data?year=${year}&month=${month.toString().padStart(2, '0')}`
-          );
-          const result = await response.json();
+          const result = { success: true, data: rowsByPeriod[period] || [] };
           
           if (result.success && result.data && result.data.length > 0) {
             // 只检查最近的10条数据
@@ -1756,6 +1787,17 @@ function HomePage() {
                 </TableBody>
               </Table>
             </TableContainer>
+            {fullDataCursor && (
+              <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                <Button
+                  variant="outlined"
+                  onClick={handleLoadMoreFullData}
+                  disabled={isLoadingMoreFullData}
+                >
+                  {isLoadingMoreFullData ? '加载中...' : '加载更多'}
+                </Button>
+              </Box>
+            )}
           </CardContent>
         </GlassCard>
 
@@ -50,6 +50,9 @@ export const callApi = async (apiFunc) => {
   }
 };
 
+// 上传任务进度的轮询间隔（毫秒）
+const JOB_POLL_INTERVAL = 1000;
+
 // 整合所有API调用到一个对象中
 export const apiService = {
   // 用户相关API
@@ -195,6 +198,32 @@ export const apiService = {
     }
   },
 
+  // 跨月份时间范围查询水质数据（start/end 格式 YYYY-MM）
+  // options 为额外的 axios 配置（如 timeout），跨多个月份的查询可能超过默认的10秒
+  getWaterQualityRange: async (start, end, filters = {}, options = {}) => {
+    const apiClient = await createApiClient();
+    const params = { start, end, ...filters };
+
+    try {
+      const response = await apiClient.get('/api/water-quality/range', { params, ...options });
+      return response.data;
+    } catch (error) {
+      throw new Error('获取时间范围水质数据失败');
+    }
+  },
+
+  // 批量查询：queries 为 [{ id, path, params }]，一次请求返回所有结果
+  batchQuery: async (queries) => {
+    const apiClient = await createApiClient();
+
+    try {
+      const response = await apiClient.post('/api/batch', { queries });
+      return response.data;
+    } catch (error) {
+      throw new Error('批量查询失败');
+    }
+  },
+
   // 获取所有省份
   getProvinces: async () => {
     const apiClient = await createApiClient();
@@ -366,15 +395,36 @@ export const apiService = {
     }
   },
 
-  // 数据上传功能
-  uploadData: async (dataType, data) => {
+  // 查询后台上传任务进度
+  getJob: async (jobId) => {
+    const apiClient = await createApiClient();
+    const response = await apiClient.get(`/api/jobs/${jobId}`);
+    return response.data.data;
+  },
+
+  // 轮询上传任务直到完成；onProgress 接收任务状态（processed_rows、rows_per_second 等）
+  waitForJob: async (jobId, onProgress) => {
+    for (;;) {
+      const job = await apiService.getJob(jobId);
+      if (onProgress) {
+        onProgress(job);
+      }
+      if (job.done) {
+        return { ...job, success: job.status === 'succeeded' && job.error_count === 0 };
+      }
+      await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL));
+    }
+  },
+
+  // 数据上传功能：提交后台任务并等待完成
+  uploadData: async (dataType, data, onJobProgress) => {
     const apiClient = await createApiClient();
     try {
       const response = await apiClient.post('/api/upload/data', {
         dataType,
         data
       });
-      return response.data;
+      return await apiService.waitForJob(response.data.job_id, onJobProgress);
     } catch (error) {
       console.error("Upload data API error:", error);
       throw new Error(`上传${dataType === 'water_quality' ? '水质' : '鱼类'}数据失败: ${error.response?.data?.error || error.message}`);
@@ -385,37 +435,45 @@ export const apiService = {
   uploadCsvData: async (dataType, csvData, progressCallback) => {
     const apiClient = await createApiClient();
     try {
-      // 分批上传大量数据
-      const batchSize = 100;
-      const batches = [];
-      for (let i = 0; i < csvData.length; i += batchSize) {
-        batches.push(csvData.slice(i, i + batchSize));
-      }
-
-      let uploadedCount = 0;
-      for (const batch of batches) {
-        const response = await apiClient.post('/api/upload/csv', {
-          dataType,
-          data: batch
-        });
-        
-        if (!response.data.success) {
-          throw new Error(response.data.error);
-        }
-        
-        uploadedCount += batch.length;
+      // 一次提交，由后台任务分块写入
+      const response = await apiClient.post('/api/upload/csv', {
+        dataType,
+        data: csvData
+      });
+      return await apiService.waitForJob(response.data.job_id, (job) => {
         if (progressCallback) {
-          progressCallback({ uploaded: uploadedCount, total: csvData.length });
+          progressCallback({ uploaded: job.processed_rows, total: csvData.length });
         }
-      }
-
-      return { success: true, message: `成功上传 ${uploadedCount} 条数据` };
+      });
     } catch (error) {
       console.error("Upload CSV data API error:", error);
       throw new Error(`批量上传${dataType === 'water_quality' ? '水质' : '鱼类'}数据失败: ${error.response?.data?.error || error.message}`);
     }
   },
 
+  // 以文件形式上传CSV，由服务端后台任务分块解析和插入；progressCallback 接收已上传的比例 (0-1)，onJobProgress 接收任务状态
+  uploadCsvFile: async (dataType, file, progressCallback, onJobProgress) => {
+    const baseURL = await getApiBaseUrl();
+    const formData = new FormData();
+    formData.append('dataType', dataType);
+    formData.append('file', file);
+
+    try {
+      const response = await axios.post(`${baseURL}/api/upload/csv-file`, formData, {
+        timeout: 0,
+        onUploadProgress: (event) => {
+          if (progressCallback && event.total) {
+            progressCallback(event.loaded / event.total);
+          }
+        }
+      });
+      return await apiService.waitForJob(response.data.job_id, onJobProgress);
+    } catch (error) {
+      console.error("Upload CSV file API error:", error);
+      throw new Error(`上传${dataType === 'water_quality' ? '水质' : '鱼类'}CSV文件失败: ${error.response?.data?.error || error.message}`);
+    }
+  },
+
   // 获取最近上传的数据
   getRecentUploadedData: async (dataType, limit = 20) => {
     const apiClient = await createApiClient();
@@ -1,8 +1,10 @@
 import os
+import urllib.request
 import pandas as pd
 import mysql.connector
 
 DEBUG = False
+BACKEND_URL = "http://localhost:5000"
 
 LABEL_TABLE = {
     "省份": ("province", "VARCHAR(255)", "NOT NULL"),
@@ -24,25 +26,29 @@ LABEL_TABLE = {
     "站点情况": ("station_status", "VARCHAR(255)", "NULL"),
 }
 
-NAME_TABLE = {
-    "province": "省份",
-    "basin": "流域",
-    "section_name": "断面名称",
-    "monitor_time": "监测时间",
-    "water_quality_category": "水质类别",
-    "water_temperature": "水温",
-    "pH": "pH",
-    "dissolved_oxygen": "溶解氧",
-    "conductivity": "电导率",
-    "turbidity": "浊度",
-    "permanganate_index": "高锰酸盐指数",
-    "ammonia_nitrogen": "氨氮",
-    "total_phosphorus": "总磷",
-    "total_nitrogen": "总氮",
-    "chlorophyll_a": "叶绿素α",
-    "algae_density": "藻密度",
-    "station_status": "站点情况",
+ROLLUP_TABLE = "water_quality_rollup"
+
+ROLLUP_INDICATORS = [
+    "water_temperature",
+    "pH",
+    "dissolved_oxygen",
+    "conductivity",
+    "turbidity",
+    "permanganate_index",
+    "ammonia_nitrogen",
+    "total_phosphorus",
+    "total_nitrogen",
+    "chlorophyll_a",
+    "algae_density",
+]
+
+INDEX_TABLE = {
+    "idx_section_time": ["province", "basin", "section_name", "monitor_time"],
+    "idx_category": ["water_quality_category"],
+    "idx_time_section": ["monitor_time", "section_name"],
 }
+# 与后端 WATER_QUALITY_UNIQUE_KEY 保持一致，重复导入时按该键覆盖
+UNIQUE_KEY = ("uk_section_time", ["section_name", "monitor_time"])
 
 
 def connect_to_db(host="localhost", port="3306", database="ocean-monitor"):
@@ -62,32 +68,54 @@ def create_table(cursor, table_name, columns):
         print(f"Table {table_name} already exists. Skipping creation.")
         return
 
+    # 直接按最终类型建表，并同时建立索引和唯一键，导入后无需再 ALTER；不认识的列不建
+    columns = [col for col in columns if col in LABEL_TABLE]
     columns_definition = ", ".join(
-        [f"`{LABEL_TABLE[col][0]}` VARCHAR(255) {LABEL_TABLE[col][2]} COMMENT '{col}'" for col in columns]
+        [f"`{LABEL_TABLE[col][0]}` {LABEL_TABLE[col][1]} {LABEL_TABLE[col][2]} COMMENT '{col}'" for col in columns]
     )
-    create_table_query = f"CREATE TABLE `{table_name}` ({columns_definition})"
+    index_definitions = ", ".join(
+        [f"INDEX `{name}` ({', '.join([f'`{col}`' for col in index_columns])})" for name, index_columns in INDEX_TABLE.items()]
+    )
+    unique_name, unique_columns = UNIQUE_KEY
+    columns_definition += (
+        f", {index_definitions}, UNIQUE KEY `{unique_name}` ({', '.join([f'`{col}`' for col in unique_columns])})"
+    )
+    create_table_query = f"CREATE TABLE `{table_name}` ({columns_definition}) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
     if DEBUG:
         print(f"query: \n{create_table_query}")
     cursor.execute(create_table_query)
     print(f"Table {table_name} created successfully.")
 
 
-def import_csv_to_table(cursor, table_name, csv_file):
+def column_expression(table_name, column_type, variable):
+    # LOAD DATA 时把原始文本转换为列类型：-- 视为空值，监测时间为 "月-日 时:分"，年份取自表名
+    value = f"NULLIF({variable}, @null_index)"
+    if column_type.startswith("DATETIME"):
+        return f"STR_TO_DATE(CONCAT('{table_name[:4]}-', {value}), '%Y-%m-%d %H:%i')"
+    return value
+
+
+def import_csv_to_table(cursor, table_name, csv_file, columns):
     cursor.execute("SET @null_index = '--' COLLATE utf8mb4_0900_ai_ci")
 
     csv_file = csv_file.replace("\\", "/")
-    cursor.execute(f"DESCRIBE `{table_name}`")
-    table_columns = [row[0] for row in cursor.fetchall()]
+    # CSV 各列先读入用户变量，不认识的列丢弃
+    variables = [f"@v{i}" if col in LABEL_TABLE else "@skip" for i, col in enumerate(columns)]
+    assignments = [
+        f"`{LABEL_TABLE[col][0]}` = {column_expression(table_name, LABEL_TABLE[col][1], var)}"
+        for col, var in zip(columns, variables)
+        if col in LABEL_TABLE
+    ]
     import_query = (
         f"LOAD DATA LOCAL INFILE '{csv_file}' "
-        f"INTO TABLE `{table_name}` "
+        f"REPLACE INTO TABLE `{table_name}` "
         f"CHARACTER SET utf8 "
         f"FIELDS TERMINATED BY ',' "
         f"LINES TERMINATED BY '\\r\\n' "
         f"IGNORE 1 LINES "
-        f"({', '.join([f'{col}' for col in table_columns])}) "
+        f"({', '.join(variables)}) "
         f"SET "
-        f"{', '.join([f'{col} = NULLIF({col}, @null_index)' for col in table_columns])}"
+        f"{', '.join(assignments)}"
     )
     if DEBUG:
         print(f"query: \n{import_query}")
@@ -95,23 +123,90 @@ def import_csv_to_table(cursor, table_name, csv_file):
     print(f"Data from {csv_file} imported into table {table_name} successfully.")
 
 
-def update_table_type(cursor, table_name):
-    cursor.execute(f"DESCRIBE `{table_name}`")
-    table_columns = [row[0] for row in cursor.fetchall()]
+def create_indexes(cursor, table_name):
+    cursor.execute(f"SHOW INDEX FROM `{table_name}`")
+    existing = {row[2] for row in cursor.fetchall()}
+    for index_name, columns in INDEX_TABLE.items():
+        if index_name in existing:
+            continue
+        index_query = f"ALTER TABLE `{table_name}` ADD INDEX `{index_name}` ({', '.join([f'`{col}`' for col in columns])})"
+        if DEBUG:
+            print(f"query: \n{index_query}")
+        cursor.execute(index_query)
+        print(f"Index {index_name} created on table {table_name}.")
+
+
+def ensure_unique_key(cursor, table_name):
+    # LOAD DATA ... REPLACE 依赖唯一键才能覆盖重复记录，必须在导入前补上；旧表已有重复记录时先去重
+    unique_name, unique_columns = UNIQUE_KEY
+    cursor.execute(f"SHOW INDEX FROM `{table_name}`")
+    if unique_name in {row[2] for row in cursor.fetchall()}:
+        return
+
+    key_columns = ", ".join([f"`{col}`" for col in unique_columns])
+    cursor.execute(
+        f"SELECT COUNT(*) FROM (SELECT 1 FROM `{table_name}` GROUP BY {key_columns} HAVING COUNT(*) > 1) AS duplicated"
+    )
+    if cursor.fetchone()[0]:
+        # 复制到带唯一键的新表，重复记录只保留一条，再替换原表
+        dedup_table = f"{table_name}_dedup"
+        old_table = f"{table_name}_old"
+        cursor.execute(f"DROP TABLE IF EXISTS `{dedup_table}`, `{old_table}`")
+        cursor.execute(f"CREATE TABLE `{dedup_table}` LIKE `{table_name}`")
+        cursor.execute(f"ALTER TABLE `{dedup_table}` ADD UNIQUE KEY `{unique_name}` ({key_columns})")
+        cursor.execute(f"INSERT IGNORE INTO `{dedup_table}` SELECT * FROM `{table_name}`")
+        cursor.execute(f"RENAME TABLE `{table_name}` TO `{old_table}`, `{dedup_table}` TO `{table_name}`")
+        cursor.execute(f"DROP TABLE `{old_table}`")
+        print(f"Duplicate rows removed from table {table_name}.")
+    else:
+        unique_query = f"ALTER TABLE `{table_name}` ADD UNIQUE KEY `{unique_name}` ({key_columns})"
+        if DEBUG:
+            print(f"query: \n{unique_query}")
+        cursor.execute(unique_query)
+    print(f"Unique key {unique_name} created on table {table_name}.")
+
+
+def rebuild_rollup(cursor, table_name):
+    # 与后端 rebuild_water_quality_rollup 保持一致
+    indicator_columns = ", ".join(
+        [f"`sum_{ind}` DOUBLE NOT NULL DEFAULT 0, `null_{ind}` INT NOT NULL DEFAULT 0" for ind in ROLLUP_INDICATORS]
+    )
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS `{ROLLUP_TABLE}` ("
+        f"`period` CHAR(7) NOT NULL COMMENT '月度表名', "
+        f"`province` VARCHAR(255) NOT NULL COMMENT '省份', "
+        f"`basin` VARCHAR(255) NOT NULL COMMENT '流域', "
+        f"`category` VARCHAR(64) NOT NULL DEFAULT '' COMMENT '水质类别，空串表示未填写', "
+        f"`row_count` INT NOT NULL DEFAULT 0, "
+        f"{indicator_columns}, "
+        f"PRIMARY KEY (`period`, `province`, `basin`, `category`)"
+        f") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='水质月度统计汇总'"
+    )
+    sum_columns = ", ".join([f"`sum_{ind}`" for ind in ROLLUP_INDICATORS])
+    null_columns = ", ".join([f"`null_{ind}`" for ind in ROLLUP_INDICATORS])
+    sum_exprs = ", ".join([f"COALESCE(SUM(`{ind}`), 0)" for ind in ROLLUP_INDICATORS])
+    null_exprs = ", ".join([f"SUM(`{ind}` IS NULL)" for ind in ROLLUP_INDICATORS])
+    cursor.execute(f"DELETE FROM `{ROLLUP_TABLE}` WHERE period = %s", (table_name,))
+    rollup_query = (
+        f"INSERT INTO `{ROLLUP_TABLE}` (period, province, basin, category, row_count, {sum_columns}, {null_columns}) "
+        f"SELECT %s, province, basin, COALESCE(water_quality_category, ''), COUNT(*), {sum_exprs}, {null_exprs} "
+        f"FROM `{table_name}` "
+        f"GROUP BY province, basin, COALESCE(water_quality_category, '')"
+    )
+    if DEBUG:
+        print(f"query: \n{rollup_query}")
+    cursor.execute(rollup_query, (table_name,))
+    print(f"Rollup for table {table_name} rebuilt.")
+
 
-    for column in table_columns:
-        if column in NAME_TABLE:
-            label = NAME_TABLE[column]
-            new_type = LABEL_TABLE[label][1]
-            nullable = LABEL_TABLE[label][2]
-            if new_type.startswith("DATETIME"):
-                update_query = f"UPDATE `{table_name}` SET `{column}` = STR_TO_DATE(CONCAT(LEFT('{table_name}', 4), '-', `{column}`), '%Y-%m-%d %H:%i') WHERE `{column}` IS NOT NULL"
-                cursor.execute(update_query)
-                alter_query = f"ALTER TABLE `{table_name}` MODIFY COLUMN `{column}` {new_type} {nullable}"
-            else:
-                alter_query = f"ALTER TABLE `{table_name}` MODIFY COLUMN `{column}` {new_type} {nullable}"
-            cursor.execute(alter_query)
-            print(f"Column {column} in table {table_name} updated to type {new_type}.")
+def notify_backend_refresh():
+    # 通知后端立即刷新月度表目录，后端未启动时忽略
+    try:
+        req = urllib.request.Request(f"{BACKEND_URL}/api/water-quality/periods/refresh", method="POST")
+        urllib.request.urlopen(req, timeout=3)
+        print("Backend period catalog refreshed.")
+    except Exception as e:
+        print(f"Skip backend period refresh: {e}")
 
 
 def main(input_dir):
@@ -127,17 +222,20 @@ def main(input_dir):
                 dir = os.path.basename(root)
                 csv_file = os.path.join(root, file)
                 print(f"正在处理文件: {csv_file}")
-                df = pd.read_csv(csv_file)
-                columns = df.columns.tolist()
+                # 只读取表头
+                columns = pd.read_csv(csv_file, nrows=0).columns.tolist()
 
                 create_table(cursor, dir, columns)
-                import_csv_to_table(cursor, dir, csv_file)
+                ensure_unique_key(cursor, dir)
+                import_csv_to_table(cursor, dir, csv_file, columns)
         if flag:
-            update_table_type(cursor, dir)
+            create_indexes(cursor, dir)
+            rebuild_rollup(cursor, dir)
 
     connection.commit()
     cursor.close()
     connection.close()
+    notify_backend_refresh()
 
 
 input_dir = "data/水质数据"
@@ -1,61 +1,81 @@
 import os
 import re
 import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 
+# 表头中的 HTML 标签（贪婪匹配，从第一个 < 到最后一个 >）
+LABEL_TAG_PATTERN = re.compile(r"<.*>")
+# 单元格中的原始值：'原始值：xxx'
+RAW_VALUE_PATTERN = re.compile(r"'原始值：(.*)'")
+# 单元格中 HTML 标签包裹的文本：>xxx<
+TAG_TEXT_PATTERN = re.compile(r">(.*?)<")
+MISSING_VALUES = ["", "*"]
+
+
+def clean_column(column):
+    # 按整列处理：空值和 * 记为 --，优先取原始值，其次取标签内文本，否则保留原文
+    missing = column.isna() | column.isin(MISSING_VALUES)
+    text = column.where(~missing, "")
+    raw = text.str.extract(RAW_VALUE_PATTERN, expand=False).str.split("：").str[0].str.strip("'")
+    tagged = text.str.extract(TAG_TEXT_PATTERN, expand=False).str.strip("><")
+    return raw.fillna(tagged).fillna(text).mask(missing, "--")
+
+
 def process_data(data):
-    result = data["result"]
-    total = data["total"]
-    records = data["records"]
     thead = data["thead"]
     tbody = data["tbody"]
 
-    labels = []
-    for label in thead:
-        pat = re.search(r"<(.*)>", label)
-        if pat:
-            labels.append(label.replace(pat.group(0), ""))
-        else:
-            labels.append(label)
-
-    datas = []
-    for data in tbody:
-        row = []
-        for col in data:
-            if col is None or len(col) == 0 or col == "*":
-                row.append("--")
-                continue
-            pat = re.search(r"'原始值：.*'", col)
-            if pat:
-                row.append(pat.group(0).split("：")[1].strip("'"))
-                continue
-
-            pat = re.search(r">(.*?)<", col)
-            if pat:
-                col = pat.group(0).strip("><")
-
-            row.append(col)
-        datas.append(row)
-
-    df = pd.DataFrame(datas, columns=labels)
-    return df
-
-
-def main(input_dir, output_dir):
+    labels = [LABEL_TAG_PATTERN.sub("", label, count=1) for label in thead]
+    df = pd.DataFrame(tbody, columns=labels, dtype=object)
+    return df.apply(clean_column)
+
+
+def convert_file(file_path, output_file):
+    with open(file_path, encoding="utf-8") as f:
+        data = json.load(f)
+    df = process_data(data)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    df.to_csv(output_file, index=False, encoding="utf-8")
+    return file_path
+
+
+def is_up_to_date(file_path, output_file):
+    return os.path.exists(output_file) and os.path.getmtime(output_file) >= os.path.getmtime(file_path)
+
+
+def main(input_dir, output_dir, workers=None, incremental=False):
+    tasks = []
+    skipped = 0
     for root, _, files in os.walk(input_dir):
         for file in files:
             if file.endswith(".json"):
                 file_path = os.path.join(root, file)
-                print(f"Processing file: {file_path}")
-                with open(file_path, encoding="utf-8") as f:
-                    data = json.load(f)
-                    df = process_data(data)
-                    output_file = os.path.join(output_dir, os.path.relpath(file_path, input_dir)).replace(".json", ".csv")
-                    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-                    df.to_csv(output_file, index=False, encoding="utf-8")
+                output_file = os.path.splitext(os.path.join(output_dir, os.path.relpath(file_path, input_dir)))[0] + ".csv"
+                if incremental and is_up_to_date(file_path, output_file):
+                    skipped += 1
+                    continue
+                tasks.append((file_path, output_file))
+
+    print(f"Processing {len(tasks)} files, {skipped} up to date.")
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(convert_file, file_path, output_file): file_path for file_path, output_file in tasks}
+        for future in as_completed(futures):
+            try:
+                print(f"Processed file: {future.result()}")
+            except Exception as e:
+                failed += 1
+                print(f"Failed to process {futures[future]}: {e}")
+    print(f"Done: {len(tasks) - failed} processed, {failed} failed, {skipped} skipped.")
 
 
 input_dir = "data/水质数据"
 output_dir = "data/水质数据"
 if __name__ == "__main__":
-    main(input_dir, output_dir)
+    parser = argparse.ArgumentParser(description="将水质数据 JSON 转换为 CSV")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认为 CPU 核数")
+    parser.add_argument("--incremental", action="store_true", help="跳过 CSV 比 JSON 新的文件")
+    args = parser.parse_args()
+    main(input_dir, output_dir, workers=args.workers, incremental=args.incremental)